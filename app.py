@@ -1,28 +1,185 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash
+from flask import Flask, Blueprint, current_app, render_template, request, redirect, url_for, session, jsonify, flash, abort, Response, stream_with_context, g, has_request_context, before_render_template, template_rendered
 from flask_pymongo import PyMongo
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from werkzeug.utils import secure_filename
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.wsgi import wrap_file
+import click
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
 import requests
 import json
-from datetime import datetime, timezone
+import hashlib
+import hmac
+import mimetypes
+import re
+import shutil
+import tempfile
+import threading
+import unicodedata
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode, quote
+from bson import json_util
+from bson.errors import InvalidId
 from bson.objectid import ObjectId
+from pymongo import monitoring
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne, DeleteOne, ReplaceOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, DuplicateKeyError, OperationFailure, PyMongoError
+from PIL import Image, ImageOps
 from dotenv import load_dotenv
 import base64
+import gzip
+import io
+import bson
+try:
+    import brotli
+except ImportError:  # optional: assets are then precompressed with gzip only
+    brotli = None
 
 load_dotenv()
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
-app.config['MONGO_URI'] = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/portfolio_db')
-app.config['MONGO_DBNAME'] = 'portfolio_db'
-app.config['UPLOAD_FOLDER'] = 'static/uploads'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+class MongoJSONProvider(DefaultJSONProvider):
+    """JSON provider that also serializes ObjectIds (used by jsonify and the tojson filter)."""
+    
+    @staticmethod
+    def default(o):
+        if isinstance(o, ObjectId):
+            return str(o)
+        return DefaultJSONProvider.default(o)
+
+# All routes live on this blueprint; create_app() builds and wires an app around it
+bp = Blueprint('main', __name__, cli_group=None)
 
 # Discord OAuth2 settings
 DISCORD_CLIENT_ID = os.environ.get('DISCORD_CLIENT_ID')
 DISCORD_CLIENT_SECRET = os.environ.get('DISCORD_CLIENT_SECRET')
 DISCORD_REDIRECT_URI = os.environ.get('DISCORD_REDIRECT_URI', 'http://localhost:5000/auth/discord/callback')
+# Point DISCORD_API_BASE at a local stub (see discord_stub.py) to exercise login offline
+DISCORD_API_BASE = os.environ.get('DISCORD_API_BASE', 'https://discord.com/api').rstrip('/')
+DISCORD_CONNECT_TIMEOUT = float(os.environ.get('DISCORD_CONNECT_TIMEOUT', 3.05))  # seconds
+DISCORD_READ_TIMEOUT = float(os.environ.get('DISCORD_READ_TIMEOUT', 10))  # seconds
+
+class DiscordError(Exception):
+    """Discord rejected a request or could not be reached."""
+
+class DiscordUnavailable(DiscordError):
+    """Discord is failing or the circuit breaker is open; callers should back off."""
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures and lets one trial call through after `reset_after` seconds."""
+    
+    def __init__(self, threshold=5, reset_after=30):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+    
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_after:
+                # Half-open: let this call probe, and keep others out until it reports back
+                self.opened_at = time.monotonic()
+                return True
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+class DiscordClient:
+    """Discord OAuth2 client on one pooled keep-alive session with timeouts, retries and a circuit breaker."""
+    
+    def __init__(self, api_base, client_id, client_secret, redirect_uri,
+                 connect_timeout=3.05, read_timeout=10, retries=2, breaker=None):
+        self.api_base = api_base
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.redirect_uri = redirect_uri
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = breaker or CircuitBreaker()
+        
+        # Connection failures are retried for any method; read failures and 5xx/429
+        # only for GET, since an authorization code can only be exchanged once.
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=0.3,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def authorize_url(self):
+        params = {
+            'client_id': self.client_id,
+            'redirect_uri': self.redirect_uri,
+            'response_type': 'code',
+            'scope': 'identify email'
+        }
+        return f"{self.api_base}/oauth2/authorize?{urlencode(params, quote_via=quote)}"
+    
+    def _request(self, method, path, **kwargs):
+        if not self.breaker.allow():
+            raise DiscordUnavailable('Discord circuit breaker is open')
+        try:
+            response = self.session.request(method, f"{self.api_base}{path}", timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            self.breaker.record_failure()
+            raise DiscordUnavailable(str(e))
+        
+        if response.status_code >= 500 or response.status_code == 429:
+            self.breaker.record_failure()
+            raise DiscordUnavailable(f"Discord returned {response.status_code}")
+        self.breaker.record_success()
+        
+        try:
+            payload = response.json()
+        except ValueError:
+            raise DiscordError(f"Discord returned a non-JSON response ({response.status_code})")
+        if response.status_code >= 400:
+            raise DiscordError(payload.get('error_description') or payload.get('message') or str(response.status_code))
+        return payload
+    
+    def exchange_code(self, code):
+        """Trade an authorization code for a token response."""
+        return self._request('POST', '/oauth2/token', data={
+            'client_id': self.client_id,
+            'client_secret': self.client_secret,
+            'grant_type': 'authorization_code',
+            'code': code,
+            'redirect_uri': self.redirect_uri
+        })
+    
+    def get_current_user(self, access_token):
+        return self._request('GET', '/users/@me', headers={'Authorization': f"Bearer {access_token}"})
+
+discord_client = DiscordClient(
+    DISCORD_API_BASE,
+    DISCORD_CLIENT_ID,
+    DISCORD_CLIENT_SECRET,
+    DISCORD_REDIRECT_URI,
+    connect_timeout=DISCORD_CONNECT_TIMEOUT,
+    read_timeout=DISCORD_READ_TIMEOUT
+)
 
 # Admin configuration
 ADMIN_USER_IDS = ['1317342800941023242']  # Discord user IDs with admin access
@@ -33,25 +190,323 @@ USER_TAGS = {
     # Add more users like: 'discord_id': {'name': 'TagName', 'color': '#hexcolor'}
 }
 
-try:
-    mongo = PyMongo(app)
-    # Test the connection with a simple operation
-    if mongo.db is not None:
-        mongo.db.command('ping')
-        print("✅ MongoDB connection successful!")
-    else:
-        print("❌ MongoDB connection failed: db is None")
-        mongo = None
-except Exception as e:
-    print(f"❌ MongoDB connection failed: {e}")
-    mongo = None
+# Performance instrumentation: Mongo command and template timings are attributed
+# to the current request, sent back as Server-Timing and aggregated for /metrics.
+# Metrics are per process; with several gunicorn workers, scrape each one.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
 
-login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'login'
+class Histogram:
+    """Minimal thread-safe Prometheus-style histogram with labels."""
+    
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.setdefault(label_values, {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+    
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, series in sorted(self._series.items()):
+                labels = ','.join(f'{k}="{v}"' for k, v in zip(self.label_names, label_values))
+                prefix = f"{labels}," if labels else ''
+                for bound, count in zip(self.buckets, series['buckets']):
+                    lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {series["count"]}')
+                lines.append(f'{self.name}_sum{{{labels}}} {series["sum"]}')
+                lines.append(f'{self.name}_count{{{labels}}} {series["count"]}')
+        return lines
+
+REQUEST_DURATION = Histogram('http_request_duration_seconds', 'Time spent handling a request.', ('endpoint', 'method', 'status'))
+REQUEST_MONGO_DURATION = Histogram('http_request_mongo_duration_seconds', 'MongoDB time per request.', ('endpoint',))
+REQUEST_MONGO_COMMANDS = Histogram('http_request_mongo_commands', 'MongoDB commands per request.', ('endpoint',), COUNT_BUCKETS)
+MONGO_COMMAND_DURATION = Histogram('mongo_command_duration_seconds', 'MongoDB command latency.', ('command', 'collection'))
+TEMPLATE_RENDER_DURATION = Histogram('template_render_duration_seconds', 'Jinja template render time.', ('template',))
+
+class MongoCommandMonitor(monitoring.CommandListener):
+    """Feeds every MongoDB command into the metrics and, inside a request, into its timings."""
+    
+    def __init__(self):
+        # Only started events carry the command document, so remember each command's collection
+        self._collections = {}
+        self._lock = threading.Lock()
+    
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        with self._lock:
+            self._collections[event.request_id] = collection if isinstance(collection, str) else ''
+    
+    def succeeded(self, event):
+        self._record(event)
+    
+    def failed(self, event):
+        self._record(event)
+    
+    def _record(self, event):
+        seconds = event.duration_micros / 1e6
+        with self._lock:
+            collection = self._collections.pop(event.request_id, '')
+        MONGO_COMMAND_DURATION.observe(seconds, event.command_name, collection)
+        if has_request_context() and 'perf' in g:
+            g.perf['mongo_seconds'] += seconds
+            g.perf['mongo_commands'].append((seconds, event.command_name, collection))
+
+mongo_monitor = MongoCommandMonitor()
+
+def start_template_timer(sender, template, context, **extra):
+    if 'perf' in g:
+        g.perf['template_started'] = time.perf_counter()
+
+def stop_template_timer(sender, template, context, **extra):
+    if 'perf' in g and g.perf.get('template_started'):
+        seconds = time.perf_counter() - g.perf.pop('template_started')
+        g.perf['template_seconds'] += seconds
+        TEMPLATE_RENDER_DURATION.observe(seconds, template.name or '')
+
+@bp.before_app_request
+def start_request_timer():
+    g.perf = {'started': time.perf_counter(), 'mongo_seconds': 0.0, 'mongo_commands': [], 'template_seconds': 0.0}
+
+@bp.after_app_request
+def record_request_timings(response):
+    if 'perf' not in g:
+        return response
+    perf = g.perf
+    total = time.perf_counter() - perf['started']
+    endpoint = request.endpoint or 'unmatched'
+    
+    REQUEST_DURATION.observe(total, endpoint, request.method, str(response.status_code))
+    REQUEST_MONGO_DURATION.observe(perf['mongo_seconds'], endpoint)
+    REQUEST_MONGO_COMMANDS.observe(len(perf['mongo_commands']), endpoint)
+    
+    response.headers['Server-Timing'] = ', '.join([
+        f'db;dur={perf["mongo_seconds"] * 1000:.1f};desc="{len(perf["mongo_commands"])} queries"',
+        f'tpl;dur={perf["template_seconds"] * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}'
+    ])
+    
+    if total * 1000 >= current_app.config['SLOW_REQUEST_MS']:
+        slowest = sorted(perf['mongo_commands'], reverse=True)[:3]
+        current_app.logger.warning(
+            "Slow request %s %s: %.0fms total, %.0fms in %d Mongo commands, %.0fms rendering. Slowest commands: %s",
+            request.method, request.path, total * 1000, perf['mongo_seconds'] * 1000,
+            len(perf['mongo_commands']), perf['template_seconds'] * 1000,
+            ', '.join(f"{name} {collection} {seconds * 1000:.0f}ms" for seconds, name, collection in slowest) or 'none'
+        )
+    return response
+
+@bp.route('/metrics')
+def metrics():
+    # Off unless a token is configured: the timings map out routes and queries
+    token = current_app.config['METRICS_TOKEN']
+    if not token:
+        abort(404)
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(401)
+    lines = []
+    for histogram in (REQUEST_DURATION, REQUEST_MONGO_DURATION, REQUEST_MONGO_COMMANDS,
+                      MONGO_COMMAND_DURATION, TEMPLATE_RENDER_DURATION):
+        lines.extend(histogram.render())
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+# Liveness never touches MongoDB, so a database outage doesn't get the process restarted
+@bp.route('/healthz')
+def healthz():
+    return jsonify({'status': 'ok'})
+
+# Readiness: only route traffic here once the database answers
+@bp.route('/readyz')
+def readyz():
+    try:
+        mongo.cx.admin.command('ping')
+    except PyMongoError as e:
+        return jsonify({'status': 'unavailable', 'error': str(e)}), 503
+    return jsonify({'status': 'ok'})
+
+@bp.app_errorhandler(ConnectionFailure)
+def database_unavailable(e):
+    current_app.logger.error("MongoDB unavailable during %s %s: %s", request.method, request.path, e)
+    if request.path.startswith('/api/'):
+        return jsonify({'success': False, 'error': 'Database unavailable. Please try again later.'}), 503
+    flash('Database connection error. Please try again later.', 'error')
+    return render_template('index.html'), 503
+
+# Indexes backing the hot queries in this file, per collection: (keys, options)
+# One review per user per portfolio; submit_review relies on it for concurrent submissions
+REVIEW_UNIQUE_KEYS = [('portfolio_id', ASCENDING), ('user_id', ASCENDING)]
+
+REQUIRED_INDEXES = {
+    'users': [
+        ([('discord_id', ASCENDING)], {'unique': True}),
+        ([('username_lower', ASCENDING), ('_id', ASCENDING)], {}),
+    ],
+    'portfolios': [
+        ([('user_id', ASCENDING)], {}),
+        ([('bayes_score', DESCENDING), ('_id', DESCENDING)], {}),
+        ([('trending_score', DESCENDING), ('_id', DESCENDING)], {}),
+        ([('template', ASCENDING), ('bayes_score', DESCENDING), ('_id', DESCENDING)], {}),
+        ([('template', ASCENDING), ('trending_score', DESCENDING), ('_id', DESCENDING)], {}),
+        # A collection gets one text index; it serves /api/portfolios/search
+        ([('title', 'text'), ('username', 'text'), ('search_text', 'text')],
+         {'name': 'portfolio_search', 'weights': {'title': 10, 'username': 5, 'search_text': 1}}),
+    ],
+    'reviews': [
+        ([('portfolio_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)], {}),
+        (REVIEW_UNIQUE_KEYS, {'unique': True}),
+        ([('user_id', ASCENDING)], {}),
+    ],
+    'jobs': [
+        ([('status', ASCENDING), ('run_after', ASCENDING)], {}),
+        ([('recurring', ASCENDING)], {'unique': True, 'partialFilterExpression': {'recurring': {'$exists': True}}}),
+        ([('expires_at', ASCENDING)], {'expireAfterSeconds': 0}),
+    ],
+}
+
+def dedupe_reviews(db):
+    """Delete all but the earliest review per (portfolio, user). Returns (removed, affected portfolio ids)."""
+    duplicates = db.reviews.aggregate([
+        {'$sort': {'created_at': ASCENDING, '_id': ASCENDING}},
+        {'$group': {
+            '_id': {'portfolio_id': '$portfolio_id', 'user_id': '$user_id'},
+            'ids': {'$push': '$_id'},
+            'count': {'$sum': 1}
+        }},
+        {'$match': {'count': {'$gt': 1}}}
+    ], allowDiskUse=True)
+    extra_ids, portfolio_ids = [], set()
+    for group in duplicates:
+        extra_ids.extend(group['ids'][1:])
+        portfolio_ids.add(group['_id']['portfolio_id'])
+    _, removed = bulk_write_in_batches(db.reviews, (DeleteOne({'_id': review_id}) for review_id in extra_ids))
+    return removed, portfolio_ids
+
+def ensure_indexes(db):
+    """Create every required index. Safe to run repeatedly; returns a list of failures."""
+    failures = []
+    if ('reviews', REVIEW_UNIQUE_KEYS) in find_missing_indexes(db):
+        # Duplicates left from before the unique index would stop it from building
+        removed, portfolio_ids = dedupe_reviews(db)
+        if removed:
+            rebuild_rating_stats(portfolio_ids)
+            print(f"⚠️  Removed {removed} duplicate reviews across {len(portfolio_ids)} portfolios")
+    for collection, indexes in REQUIRED_INDEXES.items():
+        for keys, options in indexes:
+            try:
+                db[collection].create_index(keys, **options)
+            except OperationFailure as e:
+                print(f"❌ Could not create index {keys} on {collection}: {e}")
+                failures.append((collection, keys, str(e)))
+    if not failures:
+        print("✅ MongoDB indexes in place")
+    return failures
+
+def index_signature(keys, weights=None):
+    """Comparable form of an index key. The server reports a text index's fields
+    as ('_fts', 'text'), ('_ftsx', 1) plus its weights, so text fields collapse
+    into one ('_fts', fields) entry whether they come from a spec or the server."""
+    keys = [tuple(key) for key in keys]
+    text_fields = tuple(sorted(weights or [field for field, direction in keys if direction == 'text']))
+    signature = []
+    for field, direction in keys:
+        if direction == 'text' or field == '_fts':
+            if ('_fts', text_fields) not in signature:
+                signature.append(('_fts', text_fields))
+        elif field != '_ftsx':
+            signature.append((field, direction))
+    return tuple(signature)
+
+def find_missing_indexes(db):
+    """Required indexes that do not exist yet, as (collection, keys) pairs."""
+    missing = []
+    for collection, indexes in REQUIRED_INDEXES.items():
+        existing = {index_signature(info['key'], info.get('weights'))
+                    for info in db[collection].index_information().values()}
+        for keys, options in indexes:
+            if index_signature(keys) not in existing:
+                missing.append((collection, keys))
+    return missing
+
+def find_unused_indexes(db):
+    """Indexes with no recorded accesses since the server started, as (collection, name) pairs."""
+    unused = []
+    for collection in REQUIRED_INDEXES:
+        for stats in db[collection].aggregate([{'$indexStats': {}}]):
+            if stats['name'] != '_id_' and stats['accesses']['ops'] == 0:
+                unused.append((collection, stats['name']))
+    return unused
+
+def summarize_plan(plan):
+    """Flatten a winningPlan tree into 'STAGE(index)' steps, outermost first."""
+    # Slot-based engine plans (MongoDB 7+) nest the classic tree under 'queryPlan'
+    plan = plan.get('queryPlan', plan)
+    steps = []
+    while plan:
+        step = plan['stage']
+        if plan.get('indexName'):
+            step += f"({plan['indexName']})"
+        steps.append(step)
+        plan = plan.get('inputStage') or (plan.get('inputStages') or [None])[0]
+    return ' <- '.join(steps)
+
+# The query each route issues, with placeholder values, for explain()
+ROUTE_QUERIES = {
+    'load_user': lambda db: db.users.find({'discord_id': '0'}),
+    'portfolios': lambda db: db.portfolios.find({}, PORTFOLIO_CARD_PROJECTION).sort(PORTFOLIO_LISTING_SORT).limit(25),
+    'trending_portfolios': lambda db: db.portfolios.find({}, PORTFOLIO_CARD_PROJECTION).sort(ranking_sort('trending')).limit(25),
+    'search_portfolios': lambda db: db.portfolios.find({'$text': {'$search': 'design'}, 'template': 'modern'}, PORTFOLIO_CARD_PROJECTION).sort(PORTFOLIO_LISTING_SORT).limit(25),
+    'view_portfolio': lambda db: db.reviews.find({'portfolio_id': ObjectId()}).sort(REVIEW_SORT).limit(11),
+    'submit_review': lambda db: db.reviews.find({'portfolio_id': ObjectId(), 'user_id': '0'}),
+    'profile': lambda db: db.portfolios.find({'user_id': '0'}, PROFILE_PORTFOLIO_PROJECTION),
+    'public_profile': lambda db: db.users.find({'discord_id': '0'}),
+    'admin_search_users': lambda db: db.users.find({'username_lower': {'$regex': '^a'}}, USER_SEARCH_PROJECTION).sort(USER_SEARCH_SORT).limit(21),
+}
+
+@bp.cli.command('ensure-indexes')
+def ensure_indexes_command():
+    """Create any missing MongoDB indexes (removing duplicate reviews first)."""
+    if ensure_indexes(mongo.db):
+        raise click.ClickException('Some indexes could not be created')
+
+@bp.cli.command('check-indexes')
+def check_indexes_command():
+    """Report missing/unused indexes and the query plan behind each route."""
+    missing = find_missing_indexes(mongo.db)
+    print("Missing indexes:")
+    for collection, keys in missing:
+        print(f"  ❌ {collection}: {keys}")
+    if not missing:
+        print("  ✅ none")
+    
+    print("Unused indexes (no accesses since server start):")
+    unused = find_unused_indexes(mongo.db)
+    for collection, name in unused:
+        print(f"  ⚠️  {collection}: {name}")
+    if not unused:
+        print("  ✅ none")
+    
+    print("Route query plans:")
+    for route, query in ROUTE_QUERIES.items():
+        plan = query(mongo.db).explain()['queryPlanner']['winningPlan']
+        marker = '❌' if 'COLLSCAN' in summarize_plan(plan) else '✅'
+        print(f"  {marker} {route}: {summarize_plan(plan)}")
 
-# Ensure upload directory exists
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+# Bound to the app in create_app(); the client only connects on first use
+mongo = PyMongo()
+
+login_manager = LoginManager()
+login_manager.login_view = 'main.login'
 
 class User(UserMixin):
     def __init__(self, user_data):
@@ -63,97 +518,564 @@ class User(UserMixin):
         self.is_admin = str(self.id) in ADMIN_USER_IDS
         self.restrictions = user_data.get('restrictions', {})
         self.profile_visibility = user_data.get('profile_visibility', 'public')
+        self.description = user_data.get('description')
         self.tag = USER_TAGS.get(str(self.id))
 
+class UserCache:
+    """Thread-safe LRU cache of per-user values (User objects, profile summaries) keyed by discord_id, with a per-entry TTL."""
+    
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, discord_id):
+        with self._lock:
+            entry = self._entries.get(discord_id)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[discord_id]
+                return None
+            self._entries.move_to_end(discord_id)
+            return user
+    
+    def set(self, discord_id, user):
+        with self._lock:
+            self._entries[discord_id] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(discord_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, discord_id):
+        with self._lock:
+            self._entries.pop(discord_id, None)
+
+# Invalidated explicitly whenever a user document changes in this process;
+# the TTL bounds staleness for changes made by other workers.
+user_cache = None  # built by create_app()
+
 @login_manager.user_loader
 def load_user(user_id):
-    user_data = mongo.db.users.find_one({'discord_id': user_id})
+    user = user_cache.get(user_id)
+    if user:
+        return user
+    try:
+        user_data = mongo.db.users.find_one({'discord_id': user_id})
+    except PyMongoError as e:
+        # Treat the visitor as logged out, so error pages (which read
+        # current_user) still render instead of timing out a second time
+        current_app.logger.warning("Could not load user %s: %s", user_id, e)
+        return None
     if user_data:
-        return User(user_data)
+        user = User(user_data)
+        user_cache.set(user_id, user)
+        return user
     return None
 
-@app.before_request
+# Endpoints a restricted (or not yet loadable) user must still be able to reach
+RESTRICTION_EXEMPT_ENDPOINTS = ['main.discord_auth', 'main.discord_callback', 'main.logout',
+                                'main.healthz', 'main.readyz', 'main.metrics']
+
+@bp.before_app_request
 def check_user_restrictions():
     # Skip restriction checks for auth routes and static files
-    if request.endpoint in ['auth', 'auth_callback', 'logout'] or request.path.startswith('/static'):
+    if request.endpoint in RESTRICTION_EXEMPT_ENDPOINTS or request.path.startswith(('/static', '/uploads/', '/assets/')):
         return
     
     # Check if user is blocked from site access
     if current_user.is_authenticated and current_user.restrictions.get('block_site'):
         logout_user()
         flash('Your account has been restricted from accessing this site.', 'error')
-        return redirect(url_for('index'))
-
-@app.route('/')
-def index():
-    return render_template('index.html')
+        return redirect(url_for('main.index'))
 
-@app.route('/portfolios')
-def portfolios():
-    # Get all portfolios sorted by average rating (highest to lowest)
-    pipeline = [
-        {
-            '$lookup': {
-                'from': 'reviews',
-                'localField': '_id',
-                'foreignField': 'portfolio_id',
-                'as': 'reviews'
-            }
-        },
-        {
-            '$addFields': {
+# Rating totals stored on each portfolio (review_count, rating_sum, avg_rating)
+def apply_review_to_stats(portfolio_id, rating):
+    """Atomically add one review to a portfolio's rating totals."""
+    mongo.db.portfolios.update_one(
+        {'_id': portfolio_id},
+        [
+            {'$set': {
+                'review_count': {'$add': [{'$ifNull': ['$review_count', 0]}, 1]},
+                'rating_sum': {'$add': [{'$ifNull': ['$rating_sum', 0]}, rating]},
+                # Bumped on every change so cached portfolio pages know their reviews moved
+                'review_version': {'$add': [{'$ifNull': ['$review_version', 0]}, 1]},
+                'reviews_updated_at': datetime.utcnow()
+            }},
+            {'$set': {
                 'avg_rating': {
                     '$cond': {
-                        'if': {'$gt': [{'$size': '$reviews'}, 0]},
-                        'then': {'$avg': '$reviews.rating'},
+                        'if': {'$gt': ['$review_count', 0]},
+                        'then': {'$divide': ['$rating_sum', '$review_count']},
                         'else': 0
                     }
+                }
+            }}
+        ]
+    )
+
+def bulk_write_in_batches(collection, operations, batch_size=1000):
+    """Send an iterable of write operations as unordered bulk_writes; returns (modified, deleted) totals."""
+    modified = deleted = 0
+    batch = []
+    for operation in operations:
+        batch.append(operation)
+        if len(batch) >= batch_size:
+            result = collection.bulk_write(batch, ordered=False)
+            modified += result.modified_count
+            deleted += result.deleted_count
+            batch = []
+    if batch:
+        result = collection.bulk_write(batch, ordered=False)
+        modified += result.modified_count
+        deleted += result.deleted_count
+    return modified, deleted
+
+def rebuild_rating_stats(portfolio_ids=None):
+    """Recompute rating totals from the reviews collection, for every portfolio or just the given ids.
+    
+    Callers pass ids whose reviews were just removed, so those portfolios always get a new
+    review_version (their cached pages list the removed reviews); a full rebuild only touches
+    portfolios whose stored totals were wrong.
+    """
+    match = {} if portfolio_ids is None else {'portfolio_id': {'$in': list(portfolio_ids)}}
+    totals = {
+        row['_id']: row for row in mongo.db.reviews.aggregate([
+            {'$match': match},
+            {'$group': {'_id': '$portfolio_id', 'count': {'$sum': 1}, 'total': {'$sum': '$rating'}}}
+        ])
+    }
+    
+    def operations():
+        query = {} if portfolio_ids is None else {'_id': {'$in': list(portfolio_ids)}}
+        now = datetime.utcnow()
+        for portfolio in mongo.db.portfolios.find(query, {'review_count': 1, 'rating_sum': 1}):
+            row = totals.get(portfolio['_id'])
+            count = row['count'] if row else 0
+            total = row['total'] if row else 0
+            if portfolio_ids is None and (portfolio.get('review_count'), portfolio.get('rating_sum')) == (count, total):
+                continue
+            yield UpdateOne({'_id': portfolio['_id']}, {
+                '$set': {
+                    'review_count': count,
+                    'rating_sum': total,
+                    'avg_rating': total / count if count else 0,
+                    'reviews_updated_at': now
                 },
-                'review_count': {'$size': '$reviews'}
-            }
-        },
-        {
-            '$sort': {'avg_rating': -1, 'created_at': -1}
-        }
-    ]
+                # Same signal apply_review_to_stats gives: cached pages and ETags must change
+                '$inc': {'review_version': 1}
+            })
     
-    portfolios = list(mongo.db.portfolios.aggregate(pipeline))
-    return render_template('portfolios.html', portfolios=portfolios)
+    updated, _ = bulk_write_in_batches(mongo.db.portfolios, operations())
+    return updated
+
+@bp.cli.command('rebuild-rating-stats')
+def rebuild_rating_stats_command():
+    """Backfill or repair stored portfolio rating totals from reviews."""
+    updated = rebuild_rating_stats()
+    print(f"✅ Rating totals rebuilt ({updated} portfolios changed)")
+
+@bp.route('/')
+def index():
+    return render_template('index.html')
+
+# Fields needed to render a portfolio card (no elements array)
+PORTFOLIO_CARD_PROJECTION = {
+    'title': 1,
+    'template': 1,
+    'user_id': 1,
+    'username': 1,
+    'avg_rating': 1,
+    'review_count': 1,
+    'bayes_score': 1,
+    'trending_score': 1,
+    'created_at': 1
+}
+
+# Listing orders, by the precomputed score they sort on (see compute_rankings)
+RANKING_FIELDS = {'rating': 'bayes_score', 'trending': 'trending_score'}
 
-@app.route('/create')
+def ranking_sort(ranking):
+    return [(RANKING_FIELDS[ranking], DESCENDING), ('_id', DESCENDING)]
+
+PORTFOLIO_LISTING_SORT = ranking_sort('rating')
+
+def encode_cursor(position):
+    """Pack a keyset position (a small JSON-able dict) into an opaque URL-safe token."""
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+def decode_cursor(cursor):
+    return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+
+def encode_portfolio_cursor(portfolio, ranking='rating'):
+    """Encode the (score, _id) position of a portfolio in a ranking as an opaque token."""
+    return encode_cursor({'s': portfolio.get(RANKING_FIELDS[ranking]), 'i': str(portfolio['_id'])})
+
+def decode_portfolio_cursor(cursor, ranking='rating'):
+    """Turn a cursor token into a filter matching everything after that position."""
+    position = decode_cursor(cursor)
+    field = RANKING_FIELDS[ranking]
+    after = {field: position['s'], '_id': {'$lt': ObjectId(position['i'])}}
+    if position['s'] is None:
+        # Not yet scored: these sort last, so only other unscored portfolios follow
+        return after
+    return {'$or': [{field: {'$lt': position['s']}}, after, {field: None}]}
+
+def page_limit(limit):
+    limit = limit or current_app.config['PORTFOLIOS_PAGE_SIZE']
+    return max(1, min(limit, current_app.config['PORTFOLIOS_MAX_PAGE_SIZE']))
+
+def get_portfolio_page(cursor=None, limit=None, criteria=None, ranking='rating'):
+    """Return one page of portfolio cards in ranking order and the cursor for the next page."""
+    limit = page_limit(limit)
+    query = dict(criteria or {})
+    if cursor:
+        query.update(decode_portfolio_cursor(cursor, ranking))
+    
+    # Fetch one extra document to know whether another page exists
+    page = list(mongo.db.portfolios.find(query, PORTFOLIO_CARD_PROJECTION)
+                .sort(ranking_sort(ranking))
+                .limit(limit + 1))
+    next_cursor = encode_portfolio_cursor(page[limit - 1], ranking) if len(page) > limit else None
+    return page[:limit], next_cursor
+
+class RankingCache:
+    """The top cards of each ranking, held in memory and reloaded at most once per TTL.
+
+    Scores only change when compute_rankings runs, so every process can serve the
+    first pages of /portfolios from here; pages past the top N fall back to the
+    indexed keyset query.
+    """
+    
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def get(self, ranking, size, ttl):
+        """Return (cards, position by id) for a ranking."""
+        entry = self._entries.get(ranking)
+        if entry and time.monotonic() < entry[0]:
+            return entry[1], entry[2]
+        with self._lock:
+            # Another request may have reloaded it while this one waited
+            entry = self._entries.get(ranking)
+            if entry and time.monotonic() < entry[0]:
+                return entry[1], entry[2]
+            cards = list(mongo.db.portfolios.find({}, PORTFOLIO_CARD_PROJECTION)
+                         .sort(ranking_sort(ranking))
+                         .limit(size))
+            positions = {str(card['_id']): index for index, card in enumerate(cards)}
+            self._entries[ranking] = (time.monotonic() + ttl, cards, positions)
+            return cards, positions
+    
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+ranking_cache = RankingCache()
+
+def get_ranked_page(ranking='rating', cursor=None, limit=None):
+    """Like get_portfolio_page over all portfolios, but served from the in-memory top N when possible."""
+    limit = page_limit(limit)
+    top_n = current_app.config['RANKING_TOP_N']
+    cards, positions = ranking_cache.get(ranking, top_n, current_app.config['RANKING_CACHE_TTL'])
+    if cursor:
+        position = positions.get(decode_cursor(cursor)['i'])
+        start = None if position is None else position + 1
+    else:
+        start = 0
+    # Fewer cards than top_n means the cache holds the whole ranking
+    complete = len(cards) < top_n
+    if start is not None and (start + limit <= len(cards) or complete):
+        # Copies, so callers can reformat fields without touching the cache
+        page = [dict(card) for card in cards[start:start + limit]]
+        more = start + limit < len(cards) or not complete
+        return page, encode_portfolio_cursor(page[-1], ranking) if page and more else None
+    return get_portfolio_page(cursor, limit, ranking=ranking)
+
+# Portfolio search. Text from text_short/text_long elements is copied into
+# search_text whenever elements change, so one text index covers title, owner
+# and content. Ranked orders page by keyset like /portfolios; relevance order
+# can't (textScore isn't filterable), so it pages by offset up to a cap.
+SEARCH_TEXT_ELEMENT_TYPES = ('text_short', 'text_long')
+PORTFOLIO_SEARCH_SORTS = ('relevance', 'rating', 'trending')
+PORTFOLIO_SEARCH_MAX_RESULTS = 500
+
+def load_portfolio_templates():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')) as f:
+        return json.load(f)['portfolio_templates']
+
+PORTFOLIO_TEMPLATES = load_portfolio_templates()
+
+def portfolio_search_text(elements):
+    return ' '.join(
+        str(element['properties'].get('text') or '')
+        for element in elements
+        if isinstance(element, dict) and element.get('type') in SEARCH_TEXT_ELEMENT_TYPES
+        and isinstance(element.get('properties'), dict)
+    ).strip()
+
+# The same text, computed server-side so backfill-search-text can update documents in place
+SEARCH_TEXT_EXPRESSION = {'$reduce': {
+    'input': {'$filter': {
+        'input': {'$ifNull': ['$elements', []]},
+        'cond': {'$in': ['$$this.type', list(SEARCH_TEXT_ELEMENT_TYPES)]}
+    }},
+    'initialValue': '',
+    'in': {'$cond': [
+        {'$eq': ['$$value', '']},
+        {'$toString': {'$ifNull': ['$$this.properties.text', '']}},
+        {'$concat': ['$$value', ' ', {'$toString': {'$ifNull': ['$$this.properties.text', '']}}]}
+    ]}
+}}
+
+def refresh_search_text(criteria):
+    return mongo.db.portfolios.update_many(criteria, [{'$set': {'search_text': SEARCH_TEXT_EXPRESSION}}]).modified_count
+
+def search_portfolios(query='', template=None, sort='relevance', cursor=None, limit=None):
+    """Return one page of matching portfolio cards and the cursor for the next page."""
+    criteria = {}
+    if query:
+        criteria['$text'] = {'$search': query}
+    if template:
+        criteria['template'] = template
+    if not query or sort in RANKING_FIELDS:
+        ranking = sort if sort in RANKING_FIELDS else 'rating'
+        if not criteria:
+            return get_ranked_page(ranking, cursor, limit)
+        return get_portfolio_page(cursor, limit, criteria, ranking)
+    
+    limit = page_limit(limit)
+    offset = decode_cursor(cursor)['o'] if cursor else 0
+    limit = min(limit, PORTFOLIO_SEARCH_MAX_RESULTS - offset)
+    if limit <= 0:
+        return [], None
+    score = {'$meta': 'textScore'}
+    page = list(mongo.db.portfolios.find(criteria, {**PORTFOLIO_CARD_PROJECTION, 'score': score})
+                .sort([('score', score), ('_id', DESCENDING)])
+                .skip(offset)
+                .limit(limit + 1))
+    for portfolio in page:
+        portfolio.pop('score', None)
+    next_cursor = encode_cursor({'o': offset + limit}) if len(page) > limit else None
+    return page[:limit], next_cursor
+
+@bp.route('/portfolios')
+def portfolios():
+    # First page of the rating ranking (Bayesian-smoothed, so a single 5-star
+    # review doesn't outrank hundreds of 4.8s), served from the in-memory top N
+    portfolios, next_cursor = get_ranked_page()
+    return render_template('portfolios.html', portfolios=portfolios, next_cursor=next_cursor,
+                           templates=PORTFOLIO_TEMPLATES)
+
+@bp.route('/api/portfolios')
+def api_portfolios():
+    # JSON variant of /portfolios for infinite scroll
+    try:
+        portfolios, next_cursor = get_ranked_page(
+            'trending' if request.args.get('sort') == 'trending' else 'rating',
+            request.args.get('cursor'),
+            request.args.get('limit', type=int)
+        )
+    except Exception:
+        return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+    
+    for portfolio in portfolios:
+        portfolio['_id'] = str(portfolio['_id'])
+        if portfolio.get('created_at'):
+            portfolio['created_at'] = portfolio['created_at'].isoformat()
+    
+    return jsonify({'success': True, 'portfolios': portfolios, 'next_cursor': next_cursor})
+
+@bp.cli.command('backfill-search-text')
+def backfill_search_text_command():
+    """Populate search_text for portfolios saved before portfolio search existed."""
+    updated = refresh_search_text({'search_text': {'$exists': False}})
+    print(f"✅ Backfilled search_text on {updated} portfolios")
+
+@bp.route('/api/portfolios/search')
+def api_search_portfolios():
+    query = request.args.get('q', '').strip()[:200]
+    template = request.args.get('template') or None
+    sort = request.args.get('sort', 'relevance')
+    
+    if template and template not in {t['id'] for t in PORTFOLIO_TEMPLATES}:
+        return jsonify({'success': False, 'error': 'Unknown template'}), 400
+    if sort not in PORTFOLIO_SEARCH_SORTS:
+        return jsonify({'success': False, 'error': f"sort must be one of {', '.join(PORTFOLIO_SEARCH_SORTS)}"}), 400
+    try:
+        portfolios, next_cursor = search_portfolios(
+            query, template, sort,
+            request.args.get('cursor'),
+            request.args.get('limit', type=int)
+        )
+    except (ValueError, KeyError, TypeError, InvalidId):
+        return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+    
+    for portfolio in portfolios:
+        portfolio['_id'] = str(portfolio['_id'])
+        if portfolio.get('created_at'):
+            portfolio['created_at'] = portfolio['created_at'].isoformat()
+    
+    return jsonify({'success': True, 'portfolios': portfolios, 'next_cursor': next_cursor})
+
+@bp.route('/create')
 @login_required
 def create():
     # Check if user is blocked from creating portfolios
     if current_user.restrictions.get('block_portfolios') or current_user.restrictions.get('block_site'):
         flash('You are restricted from creating portfolios.', 'error')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     return render_template('create.html')
 
-@app.route('/edit/<portfolio_id>')
+@bp.route('/edit/<portfolio_id>')
 @login_required
 def edit_portfolio(portfolio_id):
     # Check if user is blocked from creating/editing portfolios
     if current_user.restrictions.get('block_portfolios') or current_user.restrictions.get('block_site'):
         flash('You are restricted from editing portfolios.', 'error')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     portfolio = mongo.db.portfolios.find_one({'_id': ObjectId(portfolio_id), 'user_id': current_user.id})
     if not portfolio:
         flash('Portfolio not found or you do not have permission to edit it.', 'error')
-        return redirect(url_for('portfolios'))
+        return redirect(url_for('main.portfolios'))
     return render_template('edit.html', portfolio=portfolio)
 
-@app.route('/portfolio/<portfolio_id>')
+class RenderedPageCache:
+    """Thread-safe LRU of encoded HTML keyed by page, bounded by total size in bytes.
+
+    Each entry remembers the version it was rendered from; a lookup with any
+    other version is a miss, and the next store replaces the entry.
+    """
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+    
+    def set(self, key, version, html):
+        with self._lock:
+            self._discard(key)
+            if len(html) > self.max_bytes:
+                return
+            self._entries[key] = (version, html)
+            self.size += len(html)
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+    
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self.size -= len(entry[1])
+
+portfolio_page_cache = None  # built by create_app()
+
+REVIEW_SORT = [('created_at', DESCENDING), ('_id', DESCENDING)]
+
+def get_review_page(portfolio_id, cursor=None, limit=None):
+    """Return one page of a portfolio's reviews, newest first, and the cursor for the next page."""
+    limit = max(1, min(limit or current_app.config['REVIEWS_PAGE_SIZE'], 100))
+    criteria = {'portfolio_id': portfolio_id}
+    if cursor:
+        position = decode_cursor(cursor)
+        created_at = datetime.fromisoformat(position['c'])
+        criteria['$or'] = [
+            {'created_at': {'$lt': created_at}},
+            {'created_at': created_at, '_id': {'$lt': ObjectId(position['i'])}}
+        ]
+    
+    reviews = list(mongo.db.reviews.find(criteria).sort(REVIEW_SORT).limit(limit + 1))
+    next_cursor = None
+    if len(reviews) > limit:
+        last = reviews[limit - 1]
+        next_cursor = encode_cursor({'c': last['created_at'].isoformat(), 'i': str(last['_id'])})
+    return reviews[:limit], next_cursor
+
+# Just enough of a portfolio to tell whether its page changed
+PORTFOLIO_VERSION_PROJECTION = {'updated_at': 1, 'review_version': 1, 'reviews_updated_at': 1}
+
+@bp.route('/portfolio/<portfolio_id>')
 def view_portfolio(portfolio_id):
-    portfolio = mongo.db.portfolios.find_one({'_id': ObjectId(portfolio_id)})
-    if not portfolio:
+    version_doc = mongo.db.portfolios.find_one({'_id': ObjectId(portfolio_id)}, PORTFOLIO_VERSION_PROJECTION)
+    if not version_doc:
         flash('Portfolio not found.', 'error')
-        return redirect(url_for('portfolios'))
+        return redirect(url_for('main.portfolios'))
+    
+    version = (version_doc.get('updated_at'), version_doc.get('review_version', 0), page_build_id())
+    # Nav bar and review/edit buttons depend on the viewer, so they are part of the ETag;
+    # only anonymous renders are shared through the page cache.
+    viewer = current_user.id if current_user.is_authenticated else None
+    etag = hashlib.md5(repr((portfolio_id, version, viewer)).encode()).hexdigest()
+    modified_times = [t for t in (version_doc.get('updated_at'), version_doc.get('reviews_updated_at')) if t]
+    # Pending flash messages are rendered into the page, so those responses are never reused
+    cacheable = not session.get('_flashes')
+    
+    html = None
+    if cacheable and request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        if cacheable and viewer is None:
+            html = portfolio_page_cache.get(portfolio_id, version)
+        if html is None:
+            portfolio = mongo.db.portfolios.find_one({'_id': ObjectId(portfolio_id)})
+            if not portfolio:
+                flash('Portfolio not found.', 'error')
+                return redirect(url_for('main.portfolios'))
+            # First page only; average and count come from the portfolio's stored totals
+            reviews, next_cursor = get_review_page(portfolio['_id'])
+            html = render_template('view_portfolio.html', portfolio=portfolio, reviews=reviews,
+                                   next_cursor=next_cursor).encode()
+            if cacheable and viewer is None:
+                portfolio_page_cache.set(portfolio_id, version, html)
+        response = Response(html, mimetype='text/html')
     
-    reviews = list(mongo.db.reviews.find({'portfolio_id': ObjectId(portfolio_id)}).sort('created_at', -1))
-    return render_template('view_portfolio.html', portfolio=portfolio, reviews=reviews)
+    if cacheable:
+        response.set_etag(etag)
+        if modified_times:
+            response.last_modified = max(modified_times)
+    response.cache_control.no_cache = True
+    response.cache_control.private = viewer is not None
+    response.vary.add('Cookie')
+    return response
 
-@app.route('/api/save_portfolio', methods=['POST'])
+@bp.route('/api/portfolio/<portfolio_id>/reviews')
+def api_portfolio_reviews(portfolio_id):
+    try:
+        reviews, next_cursor = get_review_page(
+            ObjectId(portfolio_id),
+            request.args.get('cursor'),
+            request.args.get('limit', type=int)
+        )
+    except Exception:
+        return jsonify({'success': False, 'error': 'Invalid portfolio ID or cursor'}), 400
+    
+    return jsonify({
+        'success': True,
+        'reviews': [{
+            '_id': str(review['_id']),
+            'username': review.get('username'),
+            'rating': review.get('rating'),
+            'comment': review.get('comment', ''),
+            'created_at': review['created_at'].isoformat() if review.get('created_at') else None,
+            'created_at_display': review['created_at'].strftime('%B %d, %Y') if review.get('created_at') else 'Unknown date'
+        } for review in reviews],
+        'next_cursor': next_cursor
+    })
+
+@bp.route('/api/save_portfolio', methods=['POST'])
 @login_required
 def save_portfolio():
     # Check if user is blocked from creating/editing portfolios
@@ -162,11 +1084,17 @@ def save_portfolio():
     
     data = request.get_json()
     
+    try:
+        elements = prepare_elements(data.get('elements', []))
+    except PortfolioContentError as e:
+        return jsonify({'success': False, 'error': str(e)})
+    
     portfolio_data = {
         'title': data.get('title', 'Untitled Portfolio'),
         'template': data.get('template', 'default'),
         'background_color': data.get('background_color', '#000000'),
-        'elements': data.get('elements', []),
+        'elements': elements,
+        'search_text': portfolio_search_text(elements),
         'user_id': current_user.id,
         'username': current_user.username,
         'updated_at': datetime.utcnow()
@@ -174,14 +1102,23 @@ def save_portfolio():
     
     portfolio_id = data.get('portfolio_id')
     if portfolio_id:
-        # Update existing portfolio
+        # Update existing portfolio; a client that sends its version only overwrites that version
         try:
-            result = mongo.db.portfolios.update_one(
-                {'_id': ObjectId(portfolio_id), 'user_id': current_user.id},
-                {'$set': portfolio_data}
+            criteria = {'_id': ObjectId(portfolio_id), 'user_id': current_user.id}
+            if data.get('version') is not None:
+                criteria.update(version_filter(int(data['version'])))
+            result = mongo.db.portfolios.find_one_and_update(
+                criteria,
+                {'$set': portfolio_data, '$inc': {'version': 1}},
+                projection={'version': 1},
+                return_document=ReturnDocument.AFTER
             )
-            if result.matched_count:
-                return jsonify({'success': True, 'portfolio_id': portfolio_id})
+            if result:
+                profile_summary_cache.invalidate(current_user.id)
+                return jsonify({'success': True, 'portfolio_id': portfolio_id, 'version': result['version']})
+            elif data.get('version') is not None and mongo.db.portfolios.count_documents(
+                    {'_id': ObjectId(portfolio_id), 'user_id': current_user.id}, limit=1):
+                return portfolio_conflict(portfolio_id)
             else:
                 return jsonify({'success': False, 'error': 'Portfolio not found or access denied'})
         except Exception as e:
@@ -190,12 +1127,696 @@ def save_portfolio():
         # Create new portfolio
         try:
             portfolio_data['created_at'] = datetime.now(timezone.utc)
+            portfolio_data.update({'review_count': 0, 'rating_sum': 0, 'avg_rating': 0,
+                                   'bayes_score': 0, 'trending_score': 0, 'version': 1})
             result = mongo.db.portfolios.insert_one(portfolio_data)
-            return jsonify({'success': True, 'portfolio_id': str(result.inserted_id)})
+            profile_summary_cache.invalidate(current_user.id)
+            return jsonify({'success': True, 'portfolio_id': str(result.inserted_id), 'version': 1})
         except Exception as e:
             return jsonify({'success': False, 'error': f'Failed to create portfolio: {str(e)}'})
 
-@app.route('/api/upload_image', methods=['POST'])
+# Patch-style portfolio saves. Every write bumps `version`; a patch names the
+# version it was based on and is rejected if someone else saved in between.
+PORTFOLIO_PATCH_FIELDS = ('title', 'template', 'background_color')
+ELEMENT_PATCH_FIELDS = ('type', 'x', 'y', 'width', 'height', 'properties')
+
+class PatchError(ValueError):
+    """A patch operation was malformed or does not fit the stored portfolio."""
+
+def version_filter(version):
+    # Documents saved before versioning have no field; treat them as version 0
+    if version == 0:
+        return {'version': {'$in': [0, None]}}
+    return {'version': version}
+
+def portfolio_conflict(portfolio_id):
+    current = mongo.db.portfolios.find_one({'_id': ObjectId(portfolio_id)}, {'version': 1}) or {}
+    return jsonify({
+        'success': False,
+        'error': 'This portfolio was changed somewhere else. Reload to get the latest version.',
+        'conflict': True,
+        'version': current.get('version', 0)
+    }), 409
+
+def check_patch_op(op):
+    """Reject a malformed op before anything is read or stored."""
+    kind = op.get('op') if isinstance(op, dict) else None
+    if kind == 'set':
+        if op.get('field') not in PORTFOLIO_PATCH_FIELDS:
+            raise PatchError(f"Cannot set field {op.get('field')!r}")
+        return
+    if kind not in ('add', 'update', 'remove', 'move'):
+        raise PatchError(f"Unknown operation {kind!r}")
+    
+    element_id = op.get('id') or (op.get('element') or {}).get('id')
+    if not isinstance(element_id, str) or not element_id:
+        raise PatchError('Element operations need an element id')
+    if kind == 'add' and not isinstance(op.get('element'), dict):
+        raise PatchError('add needs an element')
+    if kind == 'update':
+        changes = op.get('changes') or {}
+        if not changes or any(key not in ELEMENT_PATCH_FIELDS for key in changes):
+            raise PatchError(f"update may only change {', '.join(ELEMENT_PATCH_FIELDS)}")
+
+def apply_patch_op(fields, elements, op):
+    """Apply one checked op to the working copy; PatchError if it doesn't fit the current elements."""
+    kind = op['op']
+    if kind == 'set':
+        fields[op['field']] = op.get('value')
+        return elements
+    
+    element_id = op.get('id') or op['element']['id']
+    position = next((i for i, element in enumerate(elements) if element.get('id') == element_id), None)
+    if kind == 'add':
+        if position is not None:
+            raise PatchError(f'Element {element_id} already exists')
+        index = len(elements) if op.get('index') is None else int(op['index'])
+        return elements[:index] + [op['element']] + elements[index:]
+    if position is None:
+        raise PatchError(f'Element {element_id} does not exist')
+    if kind == 'update':
+        elements[position] = {**elements[position], **op['changes']}
+        return elements
+    if kind == 'remove':
+        return elements[:position] + elements[position + 1:]
+    # move: the element spliced into the others at `index`
+    moved = elements[position]
+    others = elements[:position] + elements[position + 1:]
+    index = int(op.get('index', 0))
+    return others[:index] + [moved] + others[index:]
+
+def apply_portfolio_patch(portfolio_id, user_id, version, ops):
+    """Apply ops as one all-or-nothing write guarded by the expected version.
+    
+    The ops are replayed against the stored document at `version`, then the result is
+    written with a single update that only matches if nobody saved in between. Returns
+    the new version, or None if the portfolio is missing or no longer at `version`;
+    an op that doesn't fit raises PatchError and nothing is written.
+    """
+    portfolio = mongo.db.portfolios.find_one(
+        {'_id': portfolio_id, 'user_id': user_id, **version_filter(version)},
+        {field: 1 for field in PORTFOLIO_PATCH_FIELDS + ('elements',)}
+    )
+    if portfolio is None:
+        return None
+    
+    fields = {}
+    original = [element for element in portfolio.get('elements') or [] if isinstance(element, dict)]
+    elements = list(original)
+    for number, op in enumerate(ops, 1):
+        try:
+            elements = apply_patch_op(fields, elements, op)
+        except PatchError as e:
+            raise PatchError(f'Operation {number}: {e}')
+    
+    update = {**fields, 'updated_at': datetime.utcnow()}
+    if any(op['op'] != 'set' for op in ops):
+        size = len(bson.encode({'elements': elements}))
+        # A patch may always shrink a portfolio, but never grow one past its budget
+        if size > current_app.config['PORTFOLIO_ELEMENTS_MAX_BYTES'] and size > len(bson.encode({'elements': original})):
+            raise PatchError(f'Portfolio is too large ({size // 1024}KB of elements)')
+        update.update({'elements': elements, 'search_text': portfolio_search_text(elements)})
+    
+    result = mongo.db.portfolios.update_one(
+        {'_id': portfolio_id, 'user_id': user_id, **version_filter(version)},
+        {'$set': update, '$inc': {'version': 1}}
+    )
+    return version + 1 if result.matched_count else None
+
+@bp.route('/api/patch_portfolio', methods=['POST'])
+@login_required
+def patch_portfolio():
+    # Check if user is blocked from creating/editing portfolios
+    if current_user.restrictions.get('block_portfolios') or current_user.restrictions.get('block_site'):
+        return jsonify({'success': False, 'error': 'You are restricted from creating or editing portfolios'})
+    
+    data = request.get_json()
+    ops = data.get('ops') or []
+    if data.get('version') is None or not isinstance(ops, list):
+        return jsonify({'success': False, 'error': 'version and a list of ops are required'}), 400
+    
+    try:
+        portfolio_id = ObjectId(data.get('portfolio_id'))
+        for op in ops:
+            check_patch_op(op)
+            prepare_patch_op(op)
+        version = apply_portfolio_patch(portfolio_id, current_user.id, int(data['version']), ops)
+    except (PatchError, TypeError, ValueError, InvalidId) as e:
+        # Nothing was written: the client keeps its version and retries the same diff
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    if version is None:
+        if not mongo.db.portfolios.count_documents({'_id': portfolio_id, 'user_id': current_user.id}, limit=1):
+            return jsonify({'success': False, 'error': 'Portfolio not found or access denied'})
+        return portfolio_conflict(portfolio_id)
+    
+    profile_summary_cache.invalidate(current_user.id)
+    return jsonify({'success': True, 'portfolio_id': str(portfolio_id), 'version': version})
+
+# Upload storage backends. Names are flat (no directories); content-addressed
+# names never change content, so they can be cached forever.
+StoredFile = namedtuple('StoredFile', ['file', 'size', 'modified'])
+
+class LocalUploadStorage:
+    """Stores uploads as plain files in a local directory."""
+    
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+    
+    def _path(self, name):
+        if name != os.path.basename(name) or name.startswith('.'):
+            raise FileNotFoundError(name)
+        return os.path.join(self.root, name)
+    
+    def exists(self, name):
+        return os.path.isfile(self._path(name))
+    
+    def save(self, name, source_path):
+        """Move a local file into storage under name, atomically."""
+        destination = self._path(name)
+        try:
+            os.replace(source_path, destination)
+        except OSError:
+            # Different filesystem: copy next to the destination, then swap in
+            shutil.copyfile(source_path, f"{destination}.part")
+            os.replace(f"{destination}.part", destination)
+            os.remove(source_path)
+    
+    def open(self, name):
+        path = self._path(name)
+        stat = os.stat(path)
+        return StoredFile(open(path, 'rb'), stat.st_size, datetime.fromtimestamp(stat.st_mtime, timezone.utc))
+    
+    def touch(self, name):
+        """Mark an existing file as just written, so the upload collector's grace period covers it again."""
+        os.utime(self._path(name))
+    
+    def delete(self, name):
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+    
+    def list(self):
+        """Yield (name, size, modified) for every stored file."""
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.endswith('.part'):
+                    stat = entry.stat()
+                    yield entry.name, stat.st_size, datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+
+# Backends selectable with UPLOAD_STORAGE; an S3-compatible backend only needs
+# the same exists/save/open/touch/delete/list methods.
+UPLOAD_STORAGE_BACKENDS = {
+    'local': lambda config: LocalUploadStorage(config['UPLOAD_FOLDER']),
+}
+
+def create_upload_storage(config):
+    backend = config['UPLOAD_STORAGE']
+    if backend not in UPLOAD_STORAGE_BACKENDS:
+        raise ValueError(f"Unknown UPLOAD_STORAGE backend: {backend}")
+    return UPLOAD_STORAGE_BACKENDS[backend](config)
+
+upload_storage = None  # built by create_app()
+
+CONTENT_ADDRESSED_NAME = re.compile(r'^([0-9a-f]{32})(_\d+)?\.(png|jpg|gif|webp)$')
+
+def upload_url(name):
+    return f'/uploads/{name}'
+
+@bp.route('/uploads/<name>')
+def serve_upload(name):
+    try:
+        stored = upload_storage.open(name)
+    except FileNotFoundError:
+        abort(404)
+    
+    response = Response(
+        wrap_file(request.environ, stored.file),
+        mimetype=mimetypes.guess_type(name)[0] or 'application/octet-stream',
+        direct_passthrough=True
+    )
+    response.content_length = stored.size
+    response.last_modified = stored.modified
+    
+    content_addressed = CONTENT_ADDRESSED_NAME.match(name)
+    if content_addressed:
+        # The name is derived from the bytes, so it can never point at different content
+        response.set_etag(name)
+        response.cache_control.public = True
+        response.cache_control.max_age = 365 * 24 * 3600
+        response.cache_control.immutable = True
+    else:
+        # Legacy timestamped uploads: revalidate hourly
+        response.set_etag(f"{stored.size}-{int(stored.modified.timestamp())}")
+        response.cache_control.public = True
+        response.cache_control.max_age = 3600
+    return response.make_conditional(request, accept_ranges=True, complete_length=stored.size)
+
+# Page CSS/JS live in static/css and static/js. At startup each file is fingerprinted
+# with a hash of its content and precompressed, and templates link to it with
+# asset_url('js/create.js') -> /assets/js/create.<hash>.js, so it can be cached forever.
+ASSET_SOURCES = ('css', 'js', 'config.json')
+FINGERPRINTED_NAME = re.compile(r'^(.+)\.([0-9a-f]{12})(\.[a-z]+)$')
+
+Asset = namedtuple('Asset', ['name', 'digest', 'mimetype', 'mtime', 'bodies'])
+
+class AssetBundle:
+    """Content-hashed, precompressed copies of the static assets, held in memory."""
+    
+    def __init__(self, static_folder, sources=ASSET_SOURCES):
+        self.static_folder = static_folder
+        self.sources = sources
+        self.assets = {}
+        self.digest = None
+        self._lock = threading.Lock()
+        self.refresh()
+    
+    def _source_files(self):
+        for source in self.sources:
+            path = os.path.join(self.static_folder, source)
+            if os.path.isfile(path):
+                yield source, path
+            elif os.path.isdir(path):
+                for entry in sorted(os.listdir(path)):
+                    if os.path.isfile(os.path.join(path, entry)):
+                        yield f'{source}/{entry}', os.path.join(path, entry)
+    
+    @staticmethod
+    def _build(name, path, mtime):
+        with open(path, 'rb') as f:
+            data = f.read()
+        bodies = {'identity': data, 'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli:
+            bodies['br'] = brotli.compress(data, quality=11)
+        # Tiny files can grow when compressed; only keep encodings that pay off
+        bodies = {encoding: body for encoding, body in bodies.items()
+                  if encoding == 'identity' or len(body) < len(data)}
+        mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        return Asset(name, hashlib.sha256(data).hexdigest()[:12], mimetype, mtime, bodies)
+    
+    def refresh(self):
+        """(Re)build every asset whose source changed; cheap enough to call per request in debug mode."""
+        assets = {}
+        for name, path in self._source_files():
+            mtime = os.stat(path).st_mtime
+            current = self.assets.get(name)
+            assets[name] = current if current and current.mtime == mtime else self._build(name, path, mtime)
+        # Changes whenever any asset does; part of the version of every cached page
+        digest = hashlib.sha256(repr(sorted((name, asset.digest) for name, asset in assets.items())).encode()).hexdigest()[:12]
+        with self._lock:
+            self.assets = assets
+            self.digest = digest
+    
+    def url(self, name):
+        asset = self.assets[name]
+        stem, ext = os.path.splitext(name)
+        return f'/assets/{stem}.{asset.digest}{ext}'
+    
+    def lookup(self, filename):
+        """Map a fingerprinted filename back to (asset, digest in the URL), or (None, None)."""
+        match = FINGERPRINTED_NAME.match(filename)
+        if not match:
+            return None, None
+        stem, digest, ext = match.groups()
+        return self.assets.get(stem + ext), digest
+
+asset_bundle = None  # built by create_app()
+
+def templates_digest(folder):
+    """Hash of every template file, so a deploy that only changes markup still gets a new build id."""
+    digest = hashlib.sha256()
+    for root, dirs, files in sorted(os.walk(folder)):
+        for name in sorted(files):
+            with open(os.path.join(root, name), 'rb') as f:
+                digest.update(name.encode() + b'\0' + f.read())
+    return digest.hexdigest()[:12]
+
+def page_build_id():
+    """Identifies the code a page was rendered with: old HTML must not be revalidated against new assets."""
+    return f"{current_app.config['APP_VERSION']}-{asset_bundle.digest}"
+
+def asset_url(name):
+    if current_app.debug:
+        asset_bundle.refresh()
+    return asset_bundle.url(name)
+
+def preferred_encoding(available):
+    accepted = request.accept_encodings
+    for encoding in ('br', 'gzip'):
+        if encoding in available and accepted[encoding] > 0:
+            return encoding
+    return 'identity'
+
+@bp.route('/assets/<path:filename>')
+def serve_asset(filename):
+    asset, digest = asset_bundle.lookup(filename)
+    if asset is None:
+        abort(404)
+    
+    encoding = preferred_encoding(asset.bodies)
+    response = Response(asset.bodies[encoding], mimetype=asset.mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(f'{asset.digest}-{encoding}')
+    response.cache_control.public = True
+    if digest == asset.digest:
+        response.cache_control.max_age = 365 * 24 * 3600
+        response.cache_control.immutable = True
+    else:
+        # A page rendered before a deploy asked for the old hash: serve the
+        # current file, but don't let it be cached under the stale name for long
+        response.cache_control.max_age = 300
+    return response.make_conditional(request)
+
+# HTML and JSON responses are compressed on the fly; assets and uploads are
+# either precompressed or already-compressed formats, and stream themselves.
+COMPRESSIBLE_MIMETYPES = ('text/html', 'application/json')
+
+@bp.after_app_request
+def compress_response(response):
+    if (response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or request.accept_encodings['gzip'] <= 0):
+        return response
+    data = response.get_data()
+    if len(data) < current_app.config['COMPRESS_MIN_BYTES']:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=current_app.config['COMPRESS_LEVEL']))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # The bytes changed, so a strong validator no longer describes them
+        response.set_etag(etag, weak=True)
+    return response
+
+# Image upload pipeline: content-hash dedup, resized variants and WebP copies
+ALLOWED_IMAGE_FORMATS = {'PNG': 'png', 'JPEG': 'jpg', 'GIF': 'gif'}
+
+def hash_upload_to_temp(stream):
+    """Stream an upload to a temp file, hashing as it goes."""
+    digest = hashlib.sha256()
+    fd, temp_path = tempfile.mkstemp(suffix='.part')
+    with os.fdopen(fd, 'wb') as out:
+        for chunk in iter(lambda: stream.read(64 * 1024), b''):
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest()[:32], temp_path
+
+def save_image_variant(image, name, image_format):
+    if upload_storage.exists(name):
+        upload_storage.touch(name)
+        return
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    fd, temp_path = tempfile.mkstemp(suffix='.part')
+    os.close(fd)
+    if image_format == 'WEBP':
+        image.save(temp_path, 'WEBP', quality=80, method=4)
+    else:
+        image.save(temp_path, image_format, optimize=True)
+    upload_storage.save(name, temp_path)
+
+def build_image_variants(source_path, content_hash, ext, image_format):
+    """Store width-bounded copies (original format and WebP) of an image."""
+    original_url = upload_url(f'{content_hash}.{ext}')
+    
+    with Image.open(source_path) as image:
+        # Animated GIFs are served as-is rather than flattened to one frame
+        if getattr(image, 'is_animated', False):
+            width, height = image.size
+            return width, height, [{'width': width, 'url': original_url, 'type': 'image/gif'}]
+        
+        # Size the variants from the image as displayed, i.e. after EXIF rotation
+        image = ImageOps.exif_transpose(image)
+        width, height = image.size
+        if image.mode in ('P', 'LA'):
+            image = image.convert('RGBA')
+        
+        largest = min(width, max(current_app.config['IMAGE_VARIANT_WIDTHS']))
+        variants = []
+        for variant_width in [w for w in current_app.config['IMAGE_VARIANT_WIDTHS'] if w < largest] + [largest]:
+            if variant_width == width:
+                resized = image
+                fallback_url = original_url
+            else:
+                resized = image.resize((variant_width, max(1, round(height * variant_width / width))), Image.LANCZOS)
+                fallback_name = f'{content_hash}_{variant_width}.{ext}'
+                save_image_variant(resized, fallback_name, image_format)
+                fallback_url = upload_url(fallback_name)
+            webp_name = f'{content_hash}_{variant_width}.webp'
+            save_image_variant(resized, webp_name, 'WEBP')
+            variants.append({'width': variant_width, 'url': fallback_url, 'type': Image.MIME[image_format]})
+            variants.append({'width': variant_width, 'url': upload_url(webp_name), 'type': 'image/webp'})
+    return width, height, variants
+
+def process_image_upload(stream):
+    """Store an uploaded image once per unique content and return its URLs and srcsets."""
+    content_hash, temp_path = hash_upload_to_temp(stream)
+    try:
+        try:
+            with Image.open(temp_path) as image:
+                image_format = image.format
+                image.verify()
+        except Exception:
+            raise ValueError('Invalid image file')
+        if image_format not in ALLOWED_IMAGE_FORMATS:
+            raise ValueError('Invalid file type')
+        
+        ext = ALLOWED_IMAGE_FORMATS[image_format]
+        width, height, variants = build_image_variants(temp_path, content_hash, ext, image_format)
+        if upload_storage.exists(f'{content_hash}.{ext}'):
+            # Same bytes uploaded before: the file may be an orphan awaiting collection
+            upload_storage.touch(f'{content_hash}.{ext}')
+        else:
+            upload_storage.save(f'{content_hash}.{ext}', temp_path)
+    finally:
+        # Left behind when the image was invalid or the same bytes were stored before
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    
+    return {
+        'url': upload_url(f'{content_hash}.{ext}'),
+        'hash': content_hash,
+        'width': width,
+        'height': height,
+        'variants': variants,
+        'srcset': ', '.join(f"{v['url']} {v['width']}w" for v in variants if v['type'] != 'image/webp'),
+        'webp_srcset': ', '.join(f"{v['url']} {v['width']}w" for v in variants if v['type'] == 'image/webp')
+    }
+
+# Inline images: data-URI payloads in element properties are moved into upload
+# storage at save time, so portfolio documents only ever hold URLs.
+DATA_URI = re.compile(r'^data:image/[\w.+-]+;base64,(.*)$', re.DOTALL)
+
+class PortfolioContentError(ValueError):
+    """Portfolio content was rejected: an unusable inline image or over a size budget."""
+
+def externalize_inline_image(data_uri):
+    """Decode a data-URI image, store it like an upload, and return the upload result."""
+    payload = DATA_URI.match(data_uri).group(1)
+    # Reject oversized payloads before decoding them
+    if len(payload) * 3 // 4 > current_app.config['INLINE_IMAGE_MAX_BYTES']:
+        raise PortfolioContentError('Inline image is too large')
+    try:
+        image_bytes = base64.b64decode(payload, validate=True)
+    except ValueError:
+        raise PortfolioContentError('Inline image is not valid base64')
+    try:
+        return process_image_upload(io.BytesIO(image_bytes))
+    except ValueError as e:
+        raise PortfolioContentError(f'Inline image rejected: {e}')
+
+def externalize_properties(properties):
+    """Replace data-URI values in an element's properties with stored upload URLs. Returns True if anything changed."""
+    changed = False
+    for key, value in list(properties.items()):
+        if isinstance(value, str) and DATA_URI.match(value):
+            stored = externalize_inline_image(value)
+            properties[key] = stored['url']
+            if key == 'src':
+                properties['srcset'] = stored['srcset']
+                properties['webp_srcset'] = stored['webp_srcset']
+            changed = True
+    return changed
+
+def check_element_budget(element):
+    size = len(bson.encode({'element': element}))
+    if size > current_app.config['ELEMENT_MAX_BYTES']:
+        raise PortfolioContentError(f"Element {element.get('id', '')} is too large ({size // 1024}KB)")
+
+def prepare_elements(elements):
+    """Externalize inline images in a full elements array and enforce size budgets."""
+    if not isinstance(elements, list):
+        raise PortfolioContentError('elements must be a list')
+    for element in elements:
+        if isinstance(element, dict) and isinstance(element.get('properties'), dict):
+            externalize_properties(element['properties'])
+        check_element_budget(element)
+    size = len(bson.encode({'elements': elements}))
+    if size > current_app.config['PORTFOLIO_ELEMENTS_MAX_BYTES']:
+        raise PortfolioContentError(f'Portfolio is too large ({size // 1024}KB of elements)')
+    return elements
+
+def prepare_patch_op(op):
+    """Externalize inline images carried by an add/update op and check its element budget."""
+    if op.get('op') == 'add' and isinstance(op.get('element'), dict):
+        if isinstance(op['element'].get('properties'), dict):
+            externalize_properties(op['element']['properties'])
+        check_element_budget(op['element'])
+    elif op.get('op') == 'update' and isinstance(op.get('changes'), dict):
+        if isinstance(op['changes'].get('properties'), dict):
+            externalize_properties(op['changes']['properties'])
+        check_element_budget(op['changes'])
+
+# Portfolios with a data-URI image under any property key of any element, not
+# just src: externalize_properties rewrites whatever key holds one
+INLINE_IMAGE_QUERY = {'$expr': {'$anyElementTrue': [{'$map': {
+    'input': {'$cond': [{'$isArray': '$elements'}, '$elements', []]},
+    'as': 'element',
+    'in': {'$anyElementTrue': [{'$map': {
+        'input': {'$objectToArray': {'$cond': [
+            {'$eq': [{'$type': '$$element.properties'}, 'object']}, '$$element.properties', {}
+        ]}},
+        'as': 'property',
+        'in': {'$cond': [
+            {'$eq': [{'$type': '$$property.v'}, 'string']},
+            {'$regexMatch': {'input': '$$property.v', 'regex': '^data:image/'}},
+            False
+        ]}
+    }}]}
+}}]}}
+
+@bp.cli.command('externalize-inline-images')
+def externalize_inline_images_command():
+    """Move data-URI images already stored in portfolios into upload storage."""
+    migrated = 0
+    failed = 0
+    for portfolio in mongo.db.portfolios.find(INLINE_IMAGE_QUERY, {'elements': 1, 'version': 1}):
+        try:
+            elements = portfolio['elements']
+            for element in elements:
+                if isinstance(element, dict) and isinstance(element.get('properties'), dict):
+                    externalize_properties(element['properties'])
+        except PortfolioContentError as e:
+            print(f"❌ {portfolio['_id']}: {e}")
+            failed += 1
+            continue
+        # Guarded by version so a concurrent save is not overwritten; updated_at
+        # moves too, so cached pages and ETags stop serving the inline images
+        result = mongo.db.portfolios.update_one(
+            {'_id': portfolio['_id'], **version_filter(portfolio.get('version', 0))},
+            {'$set': {'elements': elements, 'updated_at': datetime.utcnow()}, '$inc': {'version': 1}}
+        )
+        if result.matched_count:
+            migrated += 1
+        else:
+            print(f"⚠️  {portfolio['_id']} changed during migration; run again")
+    print(f"✅ Externalized inline images in {migrated} portfolios ({failed} failed)")
+
+# Orphaned upload collection. Mark: stream every portfolio's elements and record
+# the upload names they reference. Sweep: walk upload storage in batches and
+# delete what nothing references. Content-addressed files are kept or dropped by
+# hash, so a referenced image keeps all of its srcset/WebP variants. Files newer
+# than the grace period are never deleted: an image is uploaded before the
+# portfolio referencing it is saved, and re-uploads of existing bytes touch them.
+UPLOAD_REFERENCE = re.compile(r'/(?:static/)?uploads/([\w.-]+)')
+
+def iter_strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from iter_strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from iter_strings(item)
+
+def mark_referenced_uploads(batch_size):
+    """Return (names, hashes, portfolios scanned) for every upload referenced by a portfolio."""
+    names = set()
+    hashes = set()
+    scanned = 0
+    for portfolio in mongo.db.portfolios.find({}, {'elements': 1}, batch_size=batch_size):
+        scanned += 1
+        for text in iter_strings(portfolio.get('elements', [])):
+            for name in UPLOAD_REFERENCE.findall(text):
+                content_addressed = CONTENT_ADDRESSED_NAME.match(name)
+                if content_addressed:
+                    hashes.add(content_addressed.group(1))
+                else:
+                    names.add(name)
+    return names, hashes, scanned
+
+def collect_orphaned_uploads(grace, dry_run=False, batch_size=500, pause=0.0):
+    """Delete uploads no portfolio references and older than grace (a timedelta). Returns stats."""
+    # Anything written after the mark started is newer than the cutoff too
+    cutoff = datetime.now(timezone.utc) - grace
+    names, hashes, scanned = mark_referenced_uploads(batch_size)
+    stats = {
+        'portfolios_scanned': scanned,
+        'files_scanned': 0,
+        'bytes_scanned': 0,
+        'orphaned': 0,
+        'within_grace': 0,
+        'deleted': 0,
+        'reclaimed_bytes': 0
+    }
+    
+    def sweep(batch):
+        for name, size, modified in batch:
+            content_addressed = CONTENT_ADDRESSED_NAME.match(name)
+            referenced = content_addressed.group(1) in hashes if content_addressed else name in names
+            if referenced or name.startswith('.'):
+                continue
+            if modified > cutoff:
+                stats['within_grace'] += 1
+                continue
+            stats['orphaned'] += 1
+            stats['reclaimed_bytes'] += size
+            if not dry_run:
+                upload_storage.delete(name)
+                stats['deleted'] += 1
+    
+    batch = []
+    for entry in upload_storage.list():
+        stats['files_scanned'] += 1
+        stats['bytes_scanned'] += entry[1]
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            sweep(batch)
+            batch = []
+            if pause:
+                # Spread the deletes out so a big sweep doesn't starve request I/O
+                time.sleep(pause)
+    sweep(batch)
+    return stats
+
+@bp.cli.command('gc-uploads')
+@click.option('--dry-run', is_flag=True, help='Report what would be deleted without deleting it.')
+@click.option('--grace-hours', type=float, default=None, help='Keep unreferenced files younger than this (default UPLOAD_GC_GRACE_HOURS).')
+@click.option('--batch-size', type=int, default=500, help='Portfolios per cursor batch and files per sweep batch.')
+@click.option('--pause', type=float, default=0.0, help='Seconds to sleep between sweep batches.')
+def gc_uploads_command(dry_run, grace_hours, batch_size, pause):
+    """Delete uploaded files that no portfolio references any more."""
+    if grace_hours is None:
+        grace_hours = current_app.config['UPLOAD_GC_GRACE_HOURS']
+    stats = collect_orphaned_uploads(timedelta(hours=grace_hours), dry_run, batch_size, pause)
+    print(f"🔎 Scanned {stats['portfolios_scanned']} portfolios and {stats['files_scanned']} files "
+          f"({stats['bytes_scanned'] / 1024 / 1024:.1f}MB)")
+    print(f"⏳ {stats['within_grace']} unreferenced files are still within the {grace_hours:g}h grace period")
+    if dry_run:
+        print(f"✅ Dry run: would delete {stats['orphaned']} files and reclaim {stats['reclaimed_bytes'] / 1024 / 1024:.1f}MB")
+    else:
+        print(f"✅ Deleted {stats['deleted']} orphaned files, reclaimed {stats['reclaimed_bytes'] / 1024 / 1024:.1f}MB")
+
+@bp.route('/api/upload_image', methods=['POST'])
 @login_required
 def upload_image():
     if 'file' not in request.files:
@@ -206,18 +1827,16 @@ def upload_image():
         return jsonify({'success': False, 'error': 'No file selected'})
     
     if file and file.filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif')):
-        filename = secure_filename(file.filename)
-        # Add timestamp to avoid conflicts
-        timestamp = str(int(datetime.now(timezone.utc).timestamp()))
-        filename = f"{timestamp}_{filename}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        try:
+            result = process_image_upload(file.stream)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)})
         
-        return jsonify({'success': True, 'url': f'/static/uploads/{filename}'})
+        return jsonify({'success': True, **result})
     
     return jsonify({'success': False, 'error': 'Invalid file type'})
 
-@app.route('/api/submit_review', methods=['POST'])
+@bp.route('/api/submit_review', methods=['POST'])
 @login_required
 def submit_review():
     # Check if user is blocked from creating reviews
@@ -226,15 +1845,6 @@ def submit_review():
     
     data = request.get_json()
     
-    # Check if user already reviewed this portfolio
-    existing_review = mongo.db.reviews.find_one({
-        'portfolio_id': ObjectId(data['portfolio_id']),
-        'user_id': current_user.id
-    })
-    
-    if existing_review:
-        return jsonify({'success': False, 'error': 'You have already reviewed this portfolio'})
-    
     review_data = {
         'portfolio_id': ObjectId(data['portfolio_id']),
         'user_id': current_user.id,
@@ -244,53 +1854,56 @@ def submit_review():
         'created_at': datetime.utcnow()
     }
     
-    mongo.db.reviews.insert_one(review_data)
+    # Only inserts if this user has no review here yet; the unique (portfolio_id, user_id)
+    # index settles two submissions racing each other
+    try:
+        result = mongo.db.reviews.update_one(
+            {'portfolio_id': review_data['portfolio_id'], 'user_id': current_user.id},
+            {'$setOnInsert': review_data},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        result = None
+    if result is None or result.upserted_id is None:
+        return jsonify({'success': False, 'error': 'You have already reviewed this portfolio'})
+    apply_review_to_stats(review_data['portfolio_id'], review_data['rating'])
     return jsonify({'success': True})
 
-@app.route('/login')
+@bp.route('/login')
 def login():
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     return render_template('login.html')
 
-@app.route('/auth/discord')
+@bp.route('/auth/discord')
 def discord_auth():
-    discord_auth_url = f"https://discord.com/api/oauth2/authorize?client_id={DISCORD_CLIENT_ID}&redirect_uri={DISCORD_REDIRECT_URI}&response_type=code&scope=identify%20email"
-    return redirect(discord_auth_url)
+    return redirect(discord_client.authorize_url())
 
-@app.route('/auth/discord/callback')
+@bp.route('/auth/discord/callback')
 def discord_callback():
     code = request.args.get('code')
     if not code:
         flash('Authentication failed.', 'error')
-        return redirect(url_for('login'))
-    
-    # Exchange code for access token
-    token_data = {
-        'client_id': DISCORD_CLIENT_ID,
-        'client_secret': DISCORD_CLIENT_SECRET,
-        'grant_type': 'authorization_code',
-        'code': code,
-        'redirect_uri': DISCORD_REDIRECT_URI
-    }
+        return redirect(url_for('main.login'))
     
-    token_response = requests.post('https://discord.com/api/oauth2/token', data=token_data)
-    token_json = token_response.json()
-    
-    if 'access_token' not in token_json:
+    try:
+        # Exchange code for access token
+        token_json = discord_client.exchange_code(code)
+        
+        if 'access_token' not in token_json:
+            flash('Authentication failed.', 'error')
+            return redirect(url_for('main.login'))
+        
+        # Get user info from Discord
+        user_data = discord_client.get_current_user(token_json['access_token'])
+    except DiscordUnavailable:
+        flash('Discord is not responding right now. Please try again in a moment.', 'error')
+        return redirect(url_for('main.login'))
+    except DiscordError:
         flash('Authentication failed.', 'error')
-        return redirect(url_for('login'))
-    
-    # Get user info from Discord
-    headers = {'Authorization': f"Bearer {token_json['access_token']}"}
-    user_response = requests.get('https://discord.com/api/users/@me', headers=headers)
-    user_data = user_response.json()
+        return redirect(url_for('main.login'))
     
     # Check if user exists in database
-    if not mongo:
-        flash('Database connection error. Please try again later.', 'error')
-        return redirect(url_for('login'))
-    
     existing_user = mongo.db.users.find_one({'discord_id': user_data['id']})
     
     if existing_user:
@@ -299,17 +1912,21 @@ def discord_callback():
             {'discord_id': user_data['id']},
             {'$set': {
                 'username': user_data['username'],
+                'username_lower': normalize_username(user_data['username']),
                 'avatar': user_data.get('avatar'),
                 'email': user_data.get('email'),
                 'last_login': datetime.utcnow()
             }}
         )
+        profile_summary_cache.invalidate(user_data['id'])
         user = User(existing_user)
+        user_cache.invalidate(user_data['id'])
     else:
         # Create new user
         new_user_data = {
             'discord_id': user_data['id'],
             'username': user_data['username'],
+            'username_lower': normalize_username(user_data['username']),
             'avatar': user_data.get('avatar'),
             'email': user_data.get('email'),
             'description': '',
@@ -323,44 +1940,104 @@ def discord_callback():
     
     login_user(user)
     flash('Successfully logged in!', 'success')
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/profile')
+# Profile pages: one aggregation returns the user plus projected summaries of their
+# portfolios (never the element bodies), cached per user. Every write to the user or
+# their portfolios in this process drops the entry; the TTL bounds everything else
+# (rating changes, other workers).
+PROFILE_USER_PROJECTION = {
+    'discord_id': 1,
+    'username': 1,
+    'avatar': 1,
+    'email': 1,
+    'last_login': 1,
+    'restrictions': 1,
+    'profile_visibility': 1,
+    'description': 1
+}
+PROFILE_PREVIEW_ELEMENTS = 3
+PROFILE_PREVIEW_TEXT_LENGTH = 30
+
+PROFILE_PORTFOLIO_PROJECTION = {
+    'title': 1,
+    'template': 1,
+    'background_color': 1,
+    'avg_rating': 1,
+    'review_count': 1,
+    'created_at': 1,
+    'element_count': {'$size': {'$ifNull': ['$elements', []]}},
+    'preview_elements': {'$map': {
+        'input': {'$slice': [{'$ifNull': ['$elements', []]}, PROFILE_PREVIEW_ELEMENTS]},
+        'in': {
+            'type': '$$this.type',
+            'text': {'$cond': [
+                {'$eq': ['$$this.type', 'text_short']},
+                {'$substrCP': [{'$ifNull': ['$$this.properties.text', '']}, 0, PROFILE_PREVIEW_TEXT_LENGTH]},
+                ''
+            ]}
+        }
+    }}
+}
+
+def load_profile_summary(criteria):
+    """The user matching criteria with summaries of their portfolios, in one round trip; None if there is none."""
+    summaries = list(mongo.db.users.aggregate([
+        {'$match': criteria},
+        {'$limit': 1},
+        {'$project': PROFILE_USER_PROJECTION},
+        {'$lookup': {
+            'from': 'portfolios',
+            'let': {'discord_id': '$discord_id'},
+            'pipeline': [
+                {'$match': {'$expr': {'$eq': ['$user_id', '$$discord_id']}}},
+                {'$project': PROFILE_PORTFOLIO_PROJECTION}
+            ],
+            'as': 'portfolios'
+        }}
+    ]))
+    return summaries[0] if summaries else None
+
+def get_profile_summary(user_id):
+    """Profile summary by discord_id, or by MongoDB _id for legacy links."""
+    if ObjectId.is_valid(user_id):
+        # Legacy link: resolve the discord_id the cache is keyed by with one _id lookup
+        user = mongo.db.users.find_one({'_id': ObjectId(user_id)}, {'discord_id': 1})
+        if user:
+            user_id = user['discord_id']
+    summary = profile_summary_cache.get(user_id)
+    if summary:
+        return summary
+    summary = load_profile_summary({'discord_id': user_id})
+    if summary:
+        profile_summary_cache.set(summary['discord_id'], summary)
+    return summary
+
+profile_summary_cache = None  # built by create_app()
+
+@bp.route('/profile')
 @login_required
 def profile():
-    # Get user's portfolios
-    user_portfolios = list(mongo.db.portfolios.find({'user_id': current_user.id}))
-    return render_template('profile.html', user=current_user, portfolios=user_portfolios)
+    summary = get_profile_summary(current_user.id)
+    if not summary:
+        abort(404)
+    return render_template('profile.html', user=User(summary), portfolios=summary['portfolios'])
 
-@app.route('/profile/<user_id>')
+@bp.route('/profile/<user_id>')
 def public_profile(user_id):
-    try:
-        # Try to find by discord_id first (for direct discord ID links)
-        user_data = mongo.db.users.find_one({'discord_id': user_id})
-        
-        # If not found, try by MongoDB ObjectId (for legacy links)
-        if not user_data:
-            try:
-                user_data = mongo.db.users.find_one({'_id': ObjectId(user_id)})
-            except:
-                pass
-        
-        if not user_data:
-            flash('Profile not found.', 'error')
-            return redirect(url_for('index'))
-        
-        user = User(user_data)
-        
-        # If profile is private, show limited info
-        if user_data.get('profile_visibility') == 'private':
-            return render_template('public_profile.html', user=user, portfolios=[], is_private=True)
-        user_portfolios = list(mongo.db.portfolios.find({'user_id': user_data['discord_id']}))
-        return render_template('public_profile.html', user=user, portfolios=user_portfolios)
-    except:
+    summary = get_profile_summary(user_id)
+    if not summary:
         flash('Profile not found.', 'error')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
+    
+    user = User(summary)
+    
+    # If profile is private, show limited info
+    if summary.get('profile_visibility') == 'private':
+        return render_template('public_profile.html', user=user, portfolios=[], is_private=True)
+    return render_template('public_profile.html', user=user, portfolios=summary['portfolios'])
 
-@app.route('/api/update_profile', methods=['POST'])
+@bp.route('/api/update_profile', methods=['POST'])
 @login_required
 def update_profile():
     data = request.get_json()
@@ -376,11 +2053,13 @@ def update_profile():
             {'discord_id': current_user.id},
             {'$set': update_data}
         )
+        user_cache.invalidate(current_user.id)
+        profile_summary_cache.invalidate(current_user.id)
         return jsonify({'success': True})
     
     return jsonify({'success': False, 'error': 'No data to update'})
 
-@app.route('/api/delete_portfolio', methods=['POST'])
+@bp.route('/api/delete_portfolio', methods=['POST'])
 @login_required
 def delete_portfolio():
     data = request.get_json()
@@ -395,52 +2074,441 @@ def delete_portfolio():
     })
     
     if result.deleted_count:
+        profile_summary_cache.invalidate(current_user.id)
+        enqueue_job('cascade_portfolio_delete', {'portfolio_ids': [ObjectId(portfolio_id)]})
         return jsonify({'success': True})
     else:
         return jsonify({'success': False, 'error': 'Portfolio not found or unauthorized'})
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     logout_user()
     flash('Successfully logged out!', 'info')
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/api/stats')
+# Site statistics cache: refreshed at most once per TTL, by a single thread
+_stats_cache = {'stats': None, 'etag': None, 'expires_at': 0.0}
+_stats_lock = threading.Lock()
+
+def compute_stats(ttl):
+    # Estimated counts come from collection metadata instead of scanning
+    stats = {
+        'portfolios': mongo.db.portfolios.estimated_document_count(),
+        'users': mongo.db.users.estimated_document_count(),
+        'reviews': mongo.db.reviews.estimated_document_count()
+    }
+    _stats_cache.update({
+        'stats': stats,
+        'etag': hashlib.md5(json.dumps(stats, sort_keys=True).encode()).hexdigest(),
+        'expires_at': time.monotonic() + ttl
+    })
+
+def refresh_stats_in_background(ttl):
+    try:
+        compute_stats(ttl)
+    except Exception as e:
+        print(f"❌ Stats refresh failed: {e}")
+    finally:
+        _stats_lock.release()
+
+def get_cached_stats():
+    """Return (stats, etag), serving stale values while one background refresh runs."""
+    if _stats_cache['stats'] is not None and time.monotonic() < _stats_cache['expires_at']:
+        return _stats_cache['stats'], _stats_cache['etag']
+    
+    ttl = current_app.config['STATS_CACHE_TTL']
+    if _stats_cache['stats'] is None:
+        # Nothing to serve yet: wait for whichever request is already computing
+        with _stats_lock:
+            if _stats_cache['stats'] is None:
+                compute_stats(ttl)
+    elif _stats_lock.acquire(blocking=False):
+        # Stale: the first request to notice starts the refresh, everyone keeps the old value
+        threading.Thread(target=refresh_stats_in_background, args=(ttl,), daemon=True).start()
+    
+    return _stats_cache['stats'], _stats_cache['etag']
+
+@bp.route('/api/stats')
 def get_stats():
     try:
-        portfolio_count = mongo.db.portfolios.count_documents({})
-        user_count = mongo.db.users.count_documents({})
-        review_count = mongo.db.reviews.count_documents({})
-        
-        return jsonify({
-            'portfolios': portfolio_count,
-            'users': user_count,
-            'reviews': review_count
-        })
+        stats, etag = get_cached_stats()
     except Exception as e:
         return jsonify({
             'portfolios': 0,
             'users': 0,
             'reviews': 0
         })
+    
+    response = jsonify(stats)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['STATS_CACHE_TTL']
+    return response.make_conditional(request)
+
+def expire_stats_cache():
+    """Make the next /api/stats request in this process recount (used after bulk deletes)."""
+    _stats_cache['expires_at'] = 0.0
+
+# Background jobs. Work that shouldn't hold a request open (cascading deletes,
+# bulk admin actions) is stored in the jobs collection and run by a worker
+# thread in each process. Claiming is a single find_one_and_update, so several
+# workers can share the queue; a job whose worker died is picked up again once
+# its lease expires, and a failing job is retried with exponential backoff.
+# Handlers may run more than once, so they must be idempotent.
+JOB_HANDLERS = {}
+
+def job_handler(job_type):
+    def register(f):
+        JOB_HANDLERS[job_type] = f
+        return f
+    return register
+
+def enqueue_job(job_type, payload):
+    now = datetime.utcnow()
+    job_id = mongo.db.jobs.insert_one({
+        'type': job_type,
+        'payload': payload,
+        'status': 'pending',
+        'attempts': 0,
+        'max_attempts': current_app.config['JOB_MAX_ATTEMPTS'],
+        'run_after': now,
+        'created_at': now,
+        'updated_at': now
+    }).inserted_id
+    job_worker.wake()
+    return job_id
+
+def ensure_recurring_job(job_type, interval):
+    """Schedule job_type to run every interval seconds. Every process may call this; one job document is shared."""
+    now = datetime.utcnow()
+    try:
+        mongo.db.jobs.update_one(
+            {'recurring': job_type},
+            {
+                '$set': {'interval': interval},
+                '$setOnInsert': {
+                    'type': job_type,
+                    'payload': {},
+                    'status': 'pending',
+                    'attempts': 0,
+                    'max_attempts': current_app.config['JOB_MAX_ATTEMPTS'],
+                    'run_after': now,
+                    'created_at': now,
+                    'updated_at': now
+                }
+            },
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Another process created it at the same moment
+        pass
+
+def save_job_progress(job, **fields):
+    """Persist values into a running job's payload so a retry can pick up where this attempt stopped."""
+    mongo.db.jobs.update_one({'_id': job['_id']}, {'$set': {f'payload.{k}': v for k, v in fields.items()}})
+    job['payload'].update(fields)
+
+def claim_job(lease_seconds):
+    now = datetime.utcnow()
+    return mongo.db.jobs.find_one_and_update(
+        {'$or': [
+            {'status': 'pending', 'run_after': {'$lte': now}},
+            {'status': 'running', 'locked_until': {'$lte': now}}  # its worker died mid-job
+        ]},
+        {
+            '$set': {'status': 'running', 'locked_until': now + timedelta(seconds=lease_seconds), 'updated_at': now},
+            '$inc': {'attempts': 1}
+        },
+        sort=[('run_after', ASCENDING)],
+        return_document=ReturnDocument.AFTER
+    )
+
+def run_job(job):
+    """Run one claimed job and record the outcome. Returns True on success."""
+    try:
+        handler = JOB_HANDLERS.get(job['type'])
+        if handler is None:
+            raise ValueError(f"Unknown job type: {job['type']}")
+        result = handler(job)
+    except Exception as e:
+        now = datetime.utcnow()
+        if job['attempts'] >= job['max_attempts'] and job.get('recurring'):
+            # Give up on this run only; the schedule carries on
+            update = {'status': 'pending', 'attempts': 0, 'run_after': now + timedelta(seconds=job['interval'])}
+        elif job['attempts'] >= job['max_attempts']:
+            update = {'status': 'failed'}
+        else:
+            update = {'status': 'pending', 'run_after': now + timedelta(seconds=min(2 ** job['attempts'], 300))}
+        update.update({'last_error': str(e), 'updated_at': now})
+        mongo.db.jobs.update_one({'_id': job['_id']}, {'$set': update, '$unset': {'locked_until': ''}})
+        current_app.logger.warning("Job %s (%s) attempt %d failed: %s", job['_id'], job['type'], job['attempts'], e)
+        return False
+    
+    now = datetime.utcnow()
+    if job.get('recurring'):
+        mongo.db.jobs.update_one({'_id': job['_id']}, {
+            '$set': {
+                'status': 'pending',
+                'attempts': 0,
+                'result': result,
+                'updated_at': now,
+                'run_after': now + timedelta(seconds=job['interval'])
+            },
+            '$unset': {'locked_until': '', 'last_error': ''}
+        })
+        return True
+    mongo.db.jobs.update_one({'_id': job['_id']}, {
+        '$set': {
+            'status': 'done',
+            'result': result,
+            'updated_at': now,
+            # Finished jobs are removed by the TTL index on expires_at
+            'expires_at': now + timedelta(days=current_app.config['JOB_RETENTION_DAYS'])
+        },
+        '$unset': {'locked_until': ''}
+    })
+    return True
+
+def run_pending_jobs():
+    """Drain every job that is due right now; returns (succeeded, failed)."""
+    succeeded = failed = 0
+    while True:
+        job = claim_job(current_app.config['JOB_LEASE_SECONDS'])
+        if job is None:
+            return succeeded, failed
+        if run_job(job):
+            succeeded += 1
+        else:
+            failed += 1
+
+class JobWorker:
+    """Polls the jobs collection from a daemon thread; enqueue_job() wakes it straight away."""
+    
+    def __init__(self):
+        self._wake = threading.Event()
+        self._thread = None
+    
+    def start(self, app):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self.run, args=(app,), name='job-worker', daemon=True)
+        self._thread.start()
+    
+    def wake(self):
+        self._wake.set()
+    
+    def run(self, app):
+        """Poll and run jobs forever in the calling thread."""
+        with app.app_context():
+            scheduled = False
+            while True:
+                self._wake.clear()
+                try:
+                    if not scheduled:
+                        ensure_recurring_job('compute_rankings', app.config['RANKING_INTERVAL'])
+                        scheduled = True
+                    run_pending_jobs()
+                except PyMongoError as e:
+                    app.logger.warning("Job worker could not reach MongoDB: %s", e)
+                self._wake.wait(app.config['JOB_POLL_INTERVAL'])
+
+job_worker = JobWorker()
+
+@job_handler('cascade_portfolio_delete')
+def cascade_portfolio_delete(job):
+    """Remove the reviews left behind by deleted portfolios."""
+    portfolio_ids = job['payload']['portfolio_ids']
+    deleted = mongo.db.reviews.delete_many({'portfolio_id': {'$in': portfolio_ids}}).deleted_count
+    expire_stats_cache()
+    return {'reviews_deleted': deleted}
+
+@job_handler('restrict_users')
+def restrict_users_job(job):
+    user_ids = job['payload']['user_ids']
+    restrictions = job['payload']['restrictions']
+    modified, _ = bulk_write_in_batches(
+        mongo.db.users,
+        (UpdateOne({'_id': user_id}, {'$set': {'restrictions': restrictions}}) for user_id in user_ids)
+    )
+    # Only this process's cache; other processes pick the restriction up within USER_CACHE_TTL
+    for user in mongo.db.users.find({'_id': {'$in': user_ids}}, {'discord_id': 1}):
+        user_cache.invalidate(user['discord_id'])
+    return {'users_restricted': modified}
+
+@job_handler('delete_portfolios')
+def delete_portfolios_job(job):
+    portfolio_ids = job['payload']['portfolio_ids']
+    owners = mongo.db.portfolios.distinct('user_id', {'_id': {'$in': portfolio_ids}})
+    _, deleted = bulk_write_in_batches(mongo.db.portfolios, (DeleteOne({'_id': pid}) for pid in portfolio_ids))
+    for discord_id in owners:
+        profile_summary_cache.invalidate(discord_id)
+    return {'portfolios_deleted': deleted, **cascade_portfolio_delete(job)}
+
+@job_handler('delete_users')
+def delete_users_job(job):
+    """Delete users with their portfolios and reviews, then repair the rating totals their reviews fed into."""
+    user_ids = job['payload']['user_ids']
+    users = list(mongo.db.users.find(
+        {'_id': {'$in': user_ids}, 'discord_id': {'$nin': ADMIN_USER_IDS}}, {'discord_id': 1}
+    ))
+    discord_ids = [user['discord_id'] for user in users]
+    
+    if 'portfolio_ids' not in job['payload']:
+        # Recorded before anything is deleted, so a retry still knows what to clean up
+        save_job_progress(
+            job,
+            portfolio_ids=mongo.db.portfolios.distinct('_id', {'user_id': {'$in': discord_ids}}),
+            reviewed_portfolio_ids=mongo.db.reviews.distinct('portfolio_id', {'user_id': {'$in': discord_ids}})
+        )
+    portfolio_ids = job['payload']['portfolio_ids']
+    
+    reviews_deleted = mongo.db.reviews.delete_many({'$or': [
+        {'user_id': {'$in': discord_ids}},
+        {'portfolio_id': {'$in': portfolio_ids}}
+    ]}).deleted_count
+    _, portfolios_deleted = bulk_write_in_batches(mongo.db.portfolios, (DeleteOne({'_id': pid}) for pid in portfolio_ids))
+    rebuild_rating_stats(set(job['payload']['reviewed_portfolio_ids']) - set(portfolio_ids))
+    _, users_deleted = bulk_write_in_batches(mongo.db.users, (DeleteOne({'_id': user['_id']}) for user in users))
+    for discord_id in discord_ids:
+        user_cache.invalidate(discord_id)
+        profile_summary_cache.invalidate(discord_id)
+    expire_stats_cache()
+    return {'users_deleted': users_deleted, 'portfolios_deleted': portfolios_deleted, 'reviews_deleted': reviews_deleted}
+
+# Rankings. One aggregation over reviews yields, per portfolio, the review count,
+# rating total and a trending sum in which each review's weight (rating / 5)
+# halves every RANKING_HALF_LIFE_HOURS. The rating ranking shrinks each average
+# towards the site-wide mean as if every portfolio had RANKING_PRIOR_REVIEWS
+# extra reviews at that mean, so a few reviews can't beat a long track record.
+def compute_rankings():
+    now = datetime.utcnow()
+    half_life_ms = current_app.config['RANKING_HALF_LIFE_HOURS'] * 3600 * 1000
+    totals = {
+        row['_id']: row for row in mongo.db.reviews.aggregate([
+            {'$group': {
+                '_id': '$portfolio_id',
+                'count': {'$sum': 1},
+                'total': {'$sum': '$rating'},
+                'trending': {'$sum': {'$multiply': [
+                    {'$divide': ['$rating', 5]},
+                    {'$pow': [0.5, {'$divide': [{'$subtract': [now, {'$ifNull': ['$created_at', now]}]}, half_life_ms]}]}
+                ]}}
+            }}
+        ], allowDiskUse=True)
+    }
+    review_count = sum(row['count'] for row in totals.values())
+    prior_mean = sum(row['total'] for row in totals.values()) / review_count if review_count else 0
+    prior_weight = current_app.config['RANKING_PRIOR_REVIEWS']
+    
+    def operations():
+        for portfolio in mongo.db.portfolios.find({}, {'bayes_score': 1, 'trending_score': 1}):
+            row = totals.get(portfolio['_id'])
+            count = row['count'] if row else 0
+            scores = {
+                'bayes_score': round((prior_mean * prior_weight + (row['total'] if row else 0)) / (prior_weight + count), 6),
+                'trending_score': round(row['trending'], 6) if row else 0
+            }
+            # Only write scores that moved
+            if any(portfolio.get(field) != value for field, value in scores.items()):
+                yield UpdateOne({'_id': portfolio['_id']}, {'$set': scores})
+    
+    updated, _ = bulk_write_in_batches(mongo.db.portfolios, operations())
+    ranking_cache.invalidate()
+    return {'portfolios_updated': updated, 'reviews': review_count, 'prior_mean': round(prior_mean, 3)}
+
+@job_handler('compute_rankings')
+def compute_rankings_job(job):
+    return compute_rankings()
+
+@bp.cli.command('compute-rankings')
+def compute_rankings_command():
+    """Recompute the rating and trending scores behind portfolio listings."""
+    result = compute_rankings()
+    print(f"✅ Rankings computed from {result['reviews']} reviews (site mean {result['prior_mean']}); "
+          f"{result['portfolios_updated']} portfolios changed")
+
+@bp.cli.command('run-jobs')
+def run_jobs_command():
+    """Run every due background job now, then exit (e.g. from cron)."""
+    # Without a long-running worker, this is what schedules the rankings
+    ensure_recurring_job('compute_rankings', current_app.config['RANKING_INTERVAL'])
+    succeeded, failed = run_pending_jobs()
+    print(f"✅ Ran {succeeded} jobs ({failed} failed and will be retried or marked failed)")
+
+@bp.cli.command('run-worker')
+def run_worker_command():
+    """Build indexes, then run background jobs until interrupted."""
+    if current_app.config['MONGO_ENSURE_INDEXES']:
+        ensure_indexes_in_background(mongo.db)
+    print("✅ Job worker running (Ctrl+C to stop)")
+    job_worker.run(current_app._get_current_object())
 
 # Admin decorator
 def admin_required(f):
     def decorated_function(*args, **kwargs):
         if not current_user.is_authenticated or not current_user.is_admin:
             flash('Access denied. Admin privileges required.', 'error')
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
         return f(*args, **kwargs)
     decorated_function.__name__ = f.__name__
     return decorated_function
 
-@app.route('/admin')
+@bp.route('/admin')
 @login_required
 @admin_required
 def admin():
     return render_template('admin.html')
 
-@app.route('/api/admin/search_users', methods=['POST'])
+# Admin user search: exact discord_id lookups, or an indexed prefix match on username_lower
+USER_SEARCH_PROJECTION = {'discord_id': 1, 'username': 1, 'avatar': 1, 'created_at': 1, 'restrictions': 1}
+USER_SEARCH_SORT = [('username_lower', ASCENDING), ('_id', ASCENDING)]
+
+def normalize_username(username):
+    """Case- and width-folded form of a username, stored as username_lower for prefix search."""
+    return unicodedata.normalize('NFKC', username or '').casefold()
+
+def search_users(query, cursor=None, limit=None):
+    """Return (users, next_cursor) for an admin search query."""
+    limit = max(1, min(limit or current_app.config['ADMIN_SEARCH_PAGE_SIZE'], 100))
+    
+    if query.isascii() and query.isdigit():
+        return list(mongo.db.users.find({'discord_id': query}, USER_SEARCH_PROJECTION).limit(1)), None
+    
+    # Escaped, anchored and case-sensitive on the folded field, so the index bounds the scan
+    criteria = {'username_lower': {'$regex': '^' + re.escape(normalize_username(query))}}
+    if cursor:
+        position = decode_cursor(cursor)
+        criteria = {'$and': [criteria, {'$or': [
+            {'username_lower': {'$gt': position['u']}},
+            {'username_lower': position['u'], '_id': {'$gt': ObjectId(position['i'])}}
+        ]}]}
+    
+    users = list(mongo.db.users.find(criteria, {**USER_SEARCH_PROJECTION, 'username_lower': 1})
+                 .sort(USER_SEARCH_SORT)
+                 .limit(limit + 1))
+    next_cursor = None
+    if len(users) > limit:
+        last = users[limit - 1]
+        next_cursor = encode_cursor({'u': last['username_lower'], 'i': str(last['_id'])})
+    return users[:limit], next_cursor
+
+@bp.cli.command('backfill-username-search')
+def backfill_username_search_command():
+    """Populate username_lower for users created before admin prefix search."""
+    operations = []
+    updated = 0
+    for user in mongo.db.users.find({}, {'username': 1, 'username_lower': 1}):
+        normalized = normalize_username(user.get('username'))
+        if user.get('username_lower') != normalized:
+            operations.append(UpdateOne({'_id': user['_id']}, {'$set': {'username_lower': normalized}}))
+        if len(operations) >= 1000:
+            updated += mongo.db.users.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        updated += mongo.db.users.bulk_write(operations, ordered=False).modified_count
+    print(f"✅ username_lower backfilled ({updated} users changed)")
+
+@bp.route('/api/admin/search_users', methods=['POST'])
 @login_required
 @admin_required
 def admin_search_users():
@@ -451,27 +2519,20 @@ def admin_search_users():
         return jsonify({'success': False, 'error': 'Search query required'})
     
     try:
-        # Search by username or Discord ID
-        search_filter = {
-            '$or': [
-                {'username': {'$regex': query, '$options': 'i'}},
-                {'discord_id': {'$regex': query, '$options': 'i'}}
-            ]
-        }
-        
-        users = list(mongo.db.users.find(search_filter).limit(20))
+        users, next_cursor = search_users(query, data.get('cursor'), data.get('limit'))
         
         # Convert ObjectId to string for JSON serialization
         for user in users:
             user['_id'] = str(user['_id'])
+            user.pop('username_lower', None)
             if 'created_at' in user:
                 user['created_at'] = user['created_at'].isoformat()
         
-        return jsonify({'success': True, 'users': users})
+        return jsonify({'success': True, 'users': users, 'next_cursor': next_cursor})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/api/admin/restrict_user', methods=['POST'])
+@bp.route('/api/admin/restrict_user', methods=['POST'])
 @login_required
 @admin_required
 def admin_restrict_user():
@@ -493,19 +2554,22 @@ def admin_restrict_user():
             'applied_by': current_user.username
         }
         
-        result = mongo.db.users.update_one(
+        user = mongo.db.users.find_one_and_update(
             {'_id': ObjectId(user_id)},
-            {'$set': {'restrictions': restriction_data}}
+            {'$set': {'restrictions': restriction_data}},
+            projection={'discord_id': 1}
         )
         
-        if result.matched_count:
+        if user:
+            # Drop the cached User so the restriction applies on their next request
+            user_cache.invalidate(user['discord_id'])
             return jsonify({'success': True})
         else:
             return jsonify({'success': False, 'error': 'User not found'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/api/admin/remove_restrictions', methods=['POST'])
+@bp.route('/api/admin/remove_restrictions', methods=['POST'])
 @login_required
 @admin_required
 def admin_remove_restrictions():
@@ -516,19 +2580,21 @@ def admin_remove_restrictions():
         return jsonify({'success': False, 'error': 'User ID required'})
     
     try:
-        result = mongo.db.users.update_one(
+        user = mongo.db.users.find_one_and_update(
             {'_id': ObjectId(user_id)},
-            {'$unset': {'restrictions': ''}}
+            {'$unset': {'restrictions': ''}},
+            projection={'discord_id': 1}
         )
         
-        if result.matched_count:
+        if user:
+            user_cache.invalidate(user['discord_id'])
             return jsonify({'success': True})
         else:
             return jsonify({'success': False, 'error': 'User not found'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/api/admin/delete_portfolio', methods=['POST'])
+@bp.route('/api/admin/delete_portfolio', methods=['POST'])
 @login_required
 @admin_required
 def admin_delete_portfolio():
@@ -544,21 +2610,305 @@ def admin_delete_portfolio():
         if '/portfolio/' in portfolio_input:
             portfolio_id = portfolio_input.split('/portfolio/')[-1]
         
-        # Delete portfolio
-        portfolio_result = mongo.db.portfolios.delete_one({'_id': ObjectId(portfolio_id)})
-        
-        # Delete associated reviews
-        reviews_result = mongo.db.reviews.delete_many({'portfolio_id': ObjectId(portfolio_id)})
+        # Delete portfolio; its reviews are removed by a background job
+        deleted = mongo.db.portfolios.find_one_and_delete({'_id': ObjectId(portfolio_id)}, projection={'user_id': 1})
         
-        if portfolio_result.deleted_count:
+        if deleted:
+            profile_summary_cache.invalidate(deleted['user_id'])
+            job_id = enqueue_job('cascade_portfolio_delete', {'portfolio_ids': [ObjectId(portfolio_id)]})
             return jsonify({
                 'success': True, 
-                'message': f'Portfolio deleted. Also removed {reviews_result.deleted_count} associated reviews.'
+                'message': 'Portfolio deleted. Its reviews are being removed in the background.',
+                'job_id': str(job_id)
             })
         else:
             return jsonify({'success': False, 'error': 'Portfolio not found'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+# Bulk admin actions run as background jobs; the response carries a job id to poll
+BULK_ADMIN_ACTIONS = ['restrict_users', 'delete_users', 'delete_portfolios']
+BULK_ADMIN_MAX_IDS = 1000
+
+@bp.route('/api/admin/bulk', methods=['POST'])
+@login_required
+@admin_required
+def admin_bulk_action():
+    data = request.get_json()
+    action = data.get('action')
+    ids = data.get('ids') or []
+    
+    if action not in BULK_ADMIN_ACTIONS:
+        return jsonify({'success': False, 'error': 'Unknown bulk action'})
+    if not ids or len(ids) > BULK_ADMIN_MAX_IDS:
+        return jsonify({'success': False, 'error': f'Provide between 1 and {BULK_ADMIN_MAX_IDS} IDs'})
+    if not all(isinstance(i, str) and ObjectId.is_valid(i) for i in ids):
+        return jsonify({'success': False, 'error': 'Invalid ID in list'})
+    object_ids = list(dict.fromkeys(ObjectId(i) for i in ids))
+    
+    if action == 'restrict_users':
+        # Web processes other than the worker's keep serving cached users for up to
+        # USER_CACHE_TTL after the job runs; restrict_user is immediate only where it ran
+        restrictions = data.get('restrictions', {})
+        payload = {'user_ids': object_ids, 'restrictions': {
+            'reason': restrictions.get('reason', ''),
+            'block_reviews': restrictions.get('block_reviews', False),
+            'block_portfolios': restrictions.get('block_portfolios', False),
+            'block_site': restrictions.get('block_site', False),
+            'permanent': restrictions.get('permanent', False),
+            'applied_at': datetime.now(timezone.utc),
+            'applied_by': current_user.username
+        }}
+    elif action == 'delete_users':
+        payload = {'user_ids': object_ids}
+    else:
+        payload = {'portfolio_ids': object_ids}
+    
+    job_id = enqueue_job(action, payload)
+    return jsonify({'success': True, 'job_id': str(job_id)})
+
+@bp.route('/api/admin/jobs/<job_id>')
+@login_required
+@admin_required
+def admin_job_status(job_id):
+    if not ObjectId.is_valid(job_id):
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    job = mongo.db.jobs.find_one({'_id': ObjectId(job_id)}, {'payload': 0, 'locked_until': 0, 'expires_at': 0})
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job})
+
+# NDJSON export/import. Every line is {"collection": ..., "doc": ...} in relaxed
+# Extended JSON, so ObjectIds and datetimes survive the round trip and one file
+# can hold a full dump. Exports stream from a cursor, one batch in memory at a time.
+EXPORT_COLLECTIONS = ('users', 'portfolios', 'reviews')
+EXPORT_BATCH_SIZE = 500
+
+def iter_export_lines(queries):
+    """Yield NDJSON lines for each (collection, criteria) pair, in _id order."""
+    for collection, criteria in queries:
+        for doc in mongo.db[collection].find(criteria).sort('_id', ASCENDING).batch_size(EXPORT_BATCH_SIZE):
+            yield json_util.dumps({'collection': collection, 'doc': doc}, json_options=json_util.RELAXED_JSON_OPTIONS) + '\n'
+
+def ndjson_download(lines, filename):
+    response = Response(stream_with_context(lines), mimetype='application/x-ndjson')
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.cache_control.no_store = True
+    return response
+
+@bp.route('/api/export/portfolios')
+@login_required
+def export_my_portfolios():
+    lines = iter_export_lines([('portfolios', {'user_id': current_user.id})])
+    return ndjson_download(lines, f'portfolios-{current_user.id}.ndjson')
+
+@bp.route('/api/admin/export')
+@login_required
+@admin_required
+def admin_export():
+    collections = request.args.get('collections', ','.join(EXPORT_COLLECTIONS)).split(',')
+    if not set(collections) <= set(EXPORT_COLLECTIONS):
+        return jsonify({'success': False, 'error': f"collections must be among {', '.join(EXPORT_COLLECTIONS)}"}), 400
+    lines = iter_export_lines([(collection, {}) for collection in collections])
+    return ndjson_download(lines, f"dump-{datetime.utcnow():%Y%m%d-%H%M%S}.ndjson")
+
+def read_checkpoint(path):
+    try:
+        with open(path) as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+def write_checkpoint(path, line_number):
+    # Written beside the target and swapped in, so a crash never leaves a torn checkpoint
+    with open(f'{path}.tmp', 'w') as f:
+        f.write(str(line_number))
+    os.replace(f'{path}.tmp', path)
+
+def import_batch(batch, upsert):
+    """Write one batch of {collection: [docs]}; returns (written, skipped duplicates)."""
+    written = skipped = 0
+    for collection, docs in batch.items():
+        if upsert:
+            result = mongo.db[collection].bulk_write([ReplaceOne({'_id': doc['_id']}, doc, upsert=True) for doc in docs], ordered=False)
+            written += result.upserted_count + result.modified_count
+            skipped += len(docs) - result.upserted_count - result.modified_count
+            continue
+        try:
+            written += len(mongo.db[collection].insert_many(docs, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            # Documents already present (e.g. an import resumed without its checkpoint) are skipped
+            if any(error['code'] != 11000 for error in e.details['writeErrors']):
+                raise
+            written += e.details['nInserted']
+            skipped += len(e.details['writeErrors'])
+    return written, skipped
+
+def import_ndjson(lines, checkpoint_path, batch_size=1000, upsert=False):
+    """Import NDJSON export lines in batches, resuming after the line recorded in checkpoint_path."""
+    resume_after = read_checkpoint(checkpoint_path)
+    stats = {'resumed_after': resume_after, 'written': 0, 'skipped': 0}
+    batch = {}
+    pending = 0
+    line_number = 0
+    for line_number, line in enumerate(lines, start=1):
+        if line_number <= resume_after or not line.strip():
+            continue
+        record = json_util.loads(line, json_options=json_util.RELAXED_JSON_OPTIONS)
+        if record.get('collection') not in EXPORT_COLLECTIONS or not isinstance(record.get('doc'), dict):
+            raise ValueError(f'Line {line_number}: not an export record')
+        batch.setdefault(record['collection'], []).append(record['doc'])
+        pending += 1
+        if pending >= batch_size:
+            written, skipped = import_batch(batch, upsert)
+            stats['written'] += written
+            stats['skipped'] += skipped
+            # Only lines whose batch is committed count as done
+            write_checkpoint(checkpoint_path, line_number)
+            batch = {}
+            pending = 0
+    if batch:
+        written, skipped = import_batch(batch, upsert)
+        stats['written'] += written
+        stats['skipped'] += skipped
+    write_checkpoint(checkpoint_path, line_number)
+    return stats
+
+@bp.cli.command('export-data')
+@click.option('--output', '-o', type=click.File('w'), default='-', help='File to write (default stdout).')
+@click.option('--collections', default=','.join(EXPORT_COLLECTIONS), help='Comma-separated collections to dump.')
+@click.option('--user', 'discord_id', default=None, help="Only this user's portfolios (Discord ID).")
+def export_data_command(output, collections, discord_id):
+    """Dump collections as NDJSON, streaming from the database."""
+    if discord_id:
+        queries = [('portfolios', {'user_id': discord_id})]
+    else:
+        names = collections.split(',')
+        if not set(names) <= set(EXPORT_COLLECTIONS):
+            raise click.BadParameter(f"must be among {', '.join(EXPORT_COLLECTIONS)}", param_hint='--collections')
+        queries = [(name, {}) for name in names]
+    count = 0
+    for line in iter_export_lines(queries):
+        output.write(line)
+        count += 1
+    click.echo(f"✅ Exported {count} documents", err=True)
+
+@bp.cli.command('import-data')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', type=int, default=1000, help='Documents per insert_many/bulk_write.')
+@click.option('--upsert', is_flag=True, help='Replace documents that already exist instead of skipping them.')
+@click.option('--checkpoint', default=None, help='Progress file (default PATH.checkpoint); rerun to resume.')
+def import_data_command(path, batch_size, upsert, checkpoint):
+    """Load an NDJSON export back into the database, resumably."""
+    checkpoint = checkpoint or f'{path}.checkpoint'
+    with open(path) as f:
+        stats = import_ndjson(f, checkpoint, batch_size, upsert)
+    os.remove(checkpoint)
+    if stats['resumed_after']:
+        print(f"↪️  Resumed after line {stats['resumed_after']}")
+    print(f"✅ Imported {stats['written']} documents ({stats['skipped']} already present)")
+    print("   Run rebuild-rating-stats, backfill-search-text and compute-rankings if the import added reviews or portfolios")
+
+def create_app(config=None):
+    """Build the Flask app. Nothing here talks to MongoDB; the pooled client connects on first use."""
+    global user_cache, profile_summary_cache, portfolio_page_cache, upload_storage, asset_bundle
+    
+    app = Flask(__name__)
+    app.json = MongoJSONProvider(app)
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
+    app.config['MONGO_URI'] = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/portfolio_db')
+    app.config['MONGO_DBNAME'] = 'portfolio_db'
+    app.config['UPLOAD_FOLDER'] = 'static/uploads'
+    app.config['UPLOAD_STORAGE'] = os.environ.get('UPLOAD_STORAGE', 'local')
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+    app.config['INLINE_IMAGE_MAX_BYTES'] = 5 * 1024 * 1024  # decoded size of one data-URI image
+    app.config['ELEMENT_MAX_BYTES'] = 64 * 1024  # one element once images are externalized
+    app.config['PORTFOLIO_ELEMENTS_MAX_BYTES'] = 2 * 1024 * 1024  # the whole elements array
+    app.config['IMAGE_VARIANT_WIDTHS'] = (320, 640, 1280, 1920)  # srcset widths; the largest caps every variant
+    app.config['UPLOAD_GC_GRACE_HOURS'] = float(os.environ.get('UPLOAD_GC_GRACE_HOURS', 24))  # gc-uploads never deletes newer files
+    app.config['PORTFOLIOS_PAGE_SIZE'] = int(os.environ.get('PORTFOLIOS_PAGE_SIZE', 24))
+    app.config['PORTFOLIOS_MAX_PAGE_SIZE'] = 100
+    app.config['STATS_CACHE_TTL'] = int(os.environ.get('STATS_CACHE_TTL', 60))  # seconds
+    app.config['USER_CACHE_SIZE'] = int(os.environ.get('USER_CACHE_SIZE', 1024))
+    app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 30))  # seconds
+    app.config['PROFILE_CACHE_SIZE'] = int(os.environ.get('PROFILE_CACHE_SIZE', 1024))
+    app.config['PROFILE_CACHE_TTL'] = int(os.environ.get('PROFILE_CACHE_TTL', 60))  # seconds; bounds staleness of ratings on profile cards
+    app.config['ADMIN_SEARCH_PAGE_SIZE'] = 20
+    app.config['SLOW_REQUEST_MS'] = int(os.environ.get('SLOW_REQUEST_MS', 500))
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')  # /metrics needs "Authorization: Bearer <token>"; 404 while unset
+    app.config['REVIEWS_PAGE_SIZE'] = int(os.environ.get('REVIEWS_PAGE_SIZE', 10))
+    app.config['PAGE_CACHE_MAX_BYTES'] = int(os.environ.get('PAGE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    app.config['MONGO_MAX_POOL_SIZE'] = int(os.environ.get('MONGO_MAX_POOL_SIZE', 50))
+    app.config['MONGO_MIN_POOL_SIZE'] = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+    app.config['MONGO_SERVER_SELECTION_TIMEOUT_MS'] = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    app.config['MONGO_CONNECT_TIMEOUT_MS'] = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+    app.config['MONGO_SOCKET_TIMEOUT_MS'] = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', 15000))
+    app.config['RANKING_INTERVAL'] = int(os.environ.get('RANKING_INTERVAL', 600))  # seconds between compute_rankings runs
+    app.config['RANKING_PRIOR_REVIEWS'] = 10  # weight of the site-wide mean in the rating ranking
+    app.config['RANKING_HALF_LIFE_HOURS'] = 72  # a review's trending weight halves this often
+    app.config['RANKING_TOP_N'] = 240  # cards per ranking held in memory
+    app.config['RANKING_CACHE_TTL'] = 60  # seconds before a process reloads its top N
+    app.config['JOB_WORKER'] = os.environ.get('JOB_WORKER', '0') == '1'  # run the index build and job worker in this process
+    app.config['JOB_MAX_ATTEMPTS'] = 5
+    app.config['JOB_LEASE_SECONDS'] = 300  # a running job is handed to another worker after this long
+    app.config['JOB_POLL_INTERVAL'] = 5  # seconds between checks for retries and other workers' jobs
+    app.config['JOB_RETENTION_DAYS'] = 7  # finished jobs are kept this long for status checks
+    app.config['MONGO_ENSURE_INDEXES'] = os.environ.get('MONGO_ENSURE_INDEXES', '1') == '1'  # build indexes in the background at startup
+    app.config['COMPRESS_LEVEL'] = int(os.environ.get('COMPRESS_LEVEL', 6))  # gzip level for HTML/JSON responses
+    app.config['COMPRESS_MIN_BYTES'] = 1024  # smaller responses aren't worth compressing
+    if config:
+        app.config.update(config)
+    # Part of every portfolio page's ETag and cache key; a deploy must change it
+    if not app.config.get('APP_VERSION'):
+        app.config['APP_VERSION'] = (os.environ.get('APP_VERSION') or os.environ.get('RAILWAY_GIT_COMMIT_SHA')
+                                     or templates_digest(os.path.join(app.root_path, app.template_folder)))
+    
+    # One pooled client per process; a dead database fails requests fast instead of hanging them
+    mongo.init_app(
+        app,
+        maxPoolSize=app.config['MONGO_MAX_POOL_SIZE'],
+        minPoolSize=app.config['MONGO_MIN_POOL_SIZE'],
+        serverSelectionTimeoutMS=app.config['MONGO_SERVER_SELECTION_TIMEOUT_MS'],
+        connectTimeoutMS=app.config['MONGO_CONNECT_TIMEOUT_MS'],
+        socketTimeoutMS=app.config['MONGO_SOCKET_TIMEOUT_MS'],
+        event_listeners=[mongo_monitor]
+    )
+    login_manager.init_app(app)
+    
+    user_cache = UserCache(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'])
+    profile_summary_cache = UserCache(app.config['PROFILE_CACHE_SIZE'], app.config['PROFILE_CACHE_TTL'])
+    portfolio_page_cache = RenderedPageCache(app.config['PAGE_CACHE_MAX_BYTES'])
+    upload_storage = create_upload_storage(app.config)
+    asset_bundle = AssetBundle(app.static_folder)
+    
+    app.register_blueprint(bp)
+    app.add_template_global(asset_url)
+    before_render_template.connect(start_template_timer, app)
+    template_rendered.connect(stop_template_timer, app)
+    
+    # Importing the app (CLI commands, benchmark.py, extra web workers) stays side-effect free;
+    # only processes that opt in run background duties
+    if app.config['JOB_WORKER'] and not app.testing:
+        start_background_services(app)
+    return app
+
+def start_background_services(app):
+    """Build indexes and start the job worker on daemon threads, off the serving path."""
+    if app.config['MONGO_ENSURE_INDEXES']:
+        # The process starts serving (and /healthz answers) while indexes build
+        threading.Thread(target=ensure_indexes_in_background, args=(mongo.db,), daemon=True).start()
+    job_worker.start(app)
+
+def ensure_indexes_in_background(db):
+    try:
+        ensure_indexes(db)
+    except PyMongoError as e:
+        print(f"❌ Could not ensure indexes: {e}")
+
+app = create_app()
+
 if __name__ == '__main__':
+    # The dev server runs its own worker, in the reloader's serving process only
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true' and not app.config['JOB_WORKER']:
+        start_background_services(app)
     app.run(debug=True, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
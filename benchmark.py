@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Route-level benchmark for the portfolio site.
+
+Seeds a throwaway database with synthetic users, portfolios and reviews, drives the
+Flask routes through the test client, and reports per-route latency (p50/p95),
+MongoDB round trips per request and response size.
+
+Usage:
+    python benchmark.py --scale 1k                      # local MongoDB (portfolio_bench database)
+    python benchmark.py --scale 1k --mock               # in-memory mongomock (pip install mongomock)
+    python benchmark.py --scale 100k --save-baseline bench_100k.json
+    python benchmark.py --scale 100k --compare bench_100k.json   # exit 1 on regression
+
+The bench database is dropped and re-seeded on every run. Never point --mongo-uri
+at real data.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from bson.objectid import ObjectId
+from pymongo import monitoring
+from pymongo.errors import PyMongoError
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SCALES = {
+    '1k': {'users': 200, 'portfolios': 100, 'reviews': 1000},
+    '100k': {'users': 5000, 'portfolios': 2000, 'reviews': 100000},
+    '1m': {'users': 20000, 'portfolios': 10000, 'reviews': 1000000},
+}
+
+TEMPLATES = ['modern', 'creative', 'professional', 'developer']
+WORDS = 'design code portfolio project creative modern build ship data web python flask art photo'.split()
+BATCH_SIZE = 5000
+
+# Collection methods that cost one round trip each when running against mongomock
+MONGO_OPERATIONS = {
+    'find', 'find_one', 'aggregate', 'count_documents', 'estimated_document_count', 'distinct',
+    'insert_one', 'insert_many', 'update_one', 'update_many', 'replace_one', 'delete_one',
+    'delete_many', 'find_one_and_update', 'find_one_and_delete', 'bulk_write',
+}
+
+
+class RoundTripCounter(monitoring.CommandListener):
+    """Counts commands sent to a real MongoDB (including getMores)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+class CountingCollection:
+    """mongomock has no command monitoring, so count calls to operation methods instead."""
+
+    def __init__(self, collection, counter):
+        self._collection = collection
+        self._counter = counter
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name in MONGO_OPERATIONS:
+            def counted(*args, **kwargs):
+                self._counter.count += 1
+                return attr(*args, **kwargs)
+            return counted
+        return attr
+
+
+class CountingDatabase:
+    def __init__(self, db, counter):
+        self._db = db
+        self._counter = counter
+
+    def __getattr__(self, name):
+        attr = getattr(self._db, name)
+        if name == 'command':
+            return attr
+        return CountingCollection(attr, self._counter)
+
+    def __getitem__(self, name):
+        return CountingCollection(self._db[name], self._counter)
+
+
+def connect(args, counter):
+    """Import the app wired to the bench database; returns (app module, raw database)."""
+    if args.mock:
+        try:
+            import mongomock
+        except ImportError:
+            sys.exit("❌ --mock needs mongomock: pip install mongomock")
+        # The app's client is never used (it connects lazily); the mock is swapped in below
+        os.environ['MONGO_ENSURE_INDEXES'] = '0'
+        os.environ['JOB_WORKER'] = '0'  # background jobs would add noise to the measured round trips
+        import app as app_module
+        db = mongomock.MongoClient().portfolio_bench
+        app_module.mongo = SimpleNamespace(db=CountingDatabase(db, counter))
+        app_module.ensure_indexes(db)
+        return app_module, db
+
+    # Listeners must be registered before the app creates its client
+    monitoring.register(counter)
+    os.environ['MONGO_URI'] = args.mongo_uri
+    os.environ['MONGO_ENSURE_INDEXES'] = '0'  # seed() builds them before measuring
+    os.environ['JOB_WORKER'] = '0'  # background jobs would add noise to the measured round trips
+    import app as app_module
+    try:
+        app_module.mongo.cx.admin.command('ping')
+    except PyMongoError as e:
+        sys.exit(f"❌ Could not connect to {args.mongo_uri}: {e}")
+    return app_module, app_module.mongo.db
+
+
+def insert_batched(collection, documents):
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= BATCH_SIZE:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+
+def seed(app_module, db, sizes, rng):
+    """Drop and fill the bench database. Returns ids useful for driving routes."""
+    for name in ('users', 'portfolios', 'reviews'):
+        db[name].delete_many({})
+    app_module.ensure_indexes(db)
+    now = datetime.utcnow()
+
+    user_ids = [str(10 ** 17 + i) for i in range(sizes['users'])]
+    insert_batched(db.users, ({
+        'discord_id': discord_id,
+        'username': f'user{i}',
+        'username_lower': f'user{i}',
+        'avatar': None,
+        'description': ' '.join(rng.choices(WORDS, k=12)),
+        'profile_visibility': 'public',
+        'created_at': now - timedelta(days=rng.randint(0, 700)),
+        'last_login': now
+    } for i, discord_id in enumerate(user_ids)))
+
+    portfolios = []
+    for i in range(sizes['portfolios']):
+        owner = user_ids[i % len(user_ids)]
+        portfolios.append({
+            '_id': ObjectId(),
+            'title': ' '.join(rng.choices(WORDS, k=3)).title(),
+            'template': rng.choice(TEMPLATES),
+            'background_color': '#000000',
+            'elements': [{
+                'id': f'element_{n}',
+                'type': 'text_long' if n % 2 else 'text_short',
+                'x': 0, 'y': n * 50, 'width': 400, 'height': 120,
+                'properties': {'text': ' '.join(rng.choices(WORDS, k=60 if n % 2 else 5))}
+            } for n in range(1, 9)],
+            'user_id': owner,
+            'username': f'user{i % len(user_ids)}',
+            'review_count': 0, 'rating_sum': 0, 'avg_rating': 0, 'version': 1,
+            'created_at': now - timedelta(minutes=i),
+            'updated_at': now - timedelta(minutes=i)
+        })
+    insert_batched(db.portfolios, iter(portfolios))
+
+    # Skew reviews toward a few popular portfolios; (portfolio, user) pairs stay unique
+    def reviews():
+        per_portfolio = {}
+        produced = 0
+        while produced < sizes['reviews']:
+            portfolio = portfolios[min(int(rng.paretovariate(1.2)) - 1, len(portfolios) - 1)] \
+                if rng.random() < 0.5 else rng.choice(portfolios)
+            taken = per_portfolio.setdefault(portfolio['_id'], 0)
+            if taken >= len(user_ids):
+                continue
+            per_portfolio[portfolio['_id']] = taken + 1
+            produced += 1
+            yield {
+                'portfolio_id': portfolio['_id'],
+                'user_id': user_ids[taken],
+                'username': f'user{taken}',
+                'rating': rng.randint(1, 5),
+                'comment': ' '.join(rng.choices(WORDS, k=rng.randint(0, 30))),
+                'created_at': now - timedelta(seconds=rng.randint(0, 10 ** 7))
+            }
+    insert_batched(db.reviews, reviews())
+
+    with app_module.app.app_context():
+        app_module.rebuild_rating_stats()
+        app_module.compute_rankings()
+
+    popular = db.portfolios.find_one({}, {'_id': 1}, sort=[('review_count', -1)])
+    return {'user_id': user_ids[0], 'popular_portfolio': str(popular['_id']), 'owned_portfolio': str(portfolios[0]['_id'])}
+
+
+def measure(client, counter, request, iterations):
+    """Run one request repeatedly; returns latency, round-trip and size samples."""
+    latencies, round_trips, sizes = [], [], []
+    for _ in range(iterations):
+        counter.count = 0
+        start = time.perf_counter()
+        response = request(client)
+        latencies.append((time.perf_counter() - start) * 1000)
+        round_trips.append(counter.count)
+        sizes.append(len(response.get_data()))
+        if response.status_code >= 400:
+            raise RuntimeError(f"Request failed with {response.status_code}")
+    latencies.sort()
+    return {
+        'p50_ms': round(statistics.median(latencies), 2),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+        'round_trips': round(statistics.mean(round_trips), 2),
+        'bytes': int(statistics.mean(sizes))
+    }
+
+
+def routes(ids):
+    """Route name -> (needs login, request function)."""
+    def second_listing_page(client):
+        first = client.get('/api/portfolios').get_json()
+        return client.get('/api/portfolios', query_string={'cursor': first['next_cursor']})
+
+    return {
+        'GET /portfolios': (False, lambda c: c.get('/portfolios')),
+        'GET /api/portfolios (page 2)': (False, second_listing_page),
+        'GET /portfolio/<id> (anonymous)': (False, lambda c: c.get(f"/portfolio/{ids['popular_portfolio']}")),
+        'GET /portfolio/<id> (logged in)': (True, lambda c: c.get(f"/portfolio/{ids['popular_portfolio']}")),
+        'GET /profile/<id>': (False, lambda c: c.get(f"/profile/{ids['user_id']}")),
+        'GET /profile': (True, lambda c: c.get('/profile')),
+        'GET /api/stats': (False, lambda c: c.get('/api/stats')),
+        'POST /api/save_portfolio': (True, lambda c: c.post('/api/save_portfolio', json={
+            'portfolio_id': ids['owned_portfolio'],
+            'title': f'Bench {time.time()}',
+            'template': 'modern',
+            'elements': [{'id': 'element_1', 'type': 'text_short', 'properties': {'text': 'hello'}}]
+        })),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print a diff against a saved baseline; returns True if anything regressed."""
+    regressed = False
+    for route, current in results.items():
+        previous = baseline.get(route)
+        if not previous:
+            continue
+        problems = []
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance) and current['p95_ms'] - previous['p95_ms'] > 1:
+            problems.append(f"p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+        if current['round_trips'] > previous['round_trips']:
+            problems.append(f"round trips {previous['round_trips']} -> {current['round_trips']}")
+        if current['bytes'] > previous['bytes'] * (1 + tolerance):
+            problems.append(f"bytes {previous['bytes']} -> {current['bytes']}")
+        if problems:
+            regressed = True
+            print(f"❌ {route}: {'; '.join(problems)}")
+    if not regressed:
+        print("✅ No regressions against baseline")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=SCALES, default='1k')
+    parser.add_argument('--mock', action='store_true', help='use mongomock instead of a MongoDB server')
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017/portfolio_bench')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save-baseline', metavar='PATH')
+    parser.add_argument('--compare', metavar='PATH')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown before flagging (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    counter = RoundTripCounter()
+    app_module, db = connect(args, counter)
+    app_module.app.config['TESTING'] = True
+
+    sizes = SCALES[args.scale]
+    print(f"Seeding {sizes['users']} users, {sizes['portfolios']} portfolios, {sizes['reviews']} reviews...")
+    start = time.perf_counter()
+    ids = seed(app_module, db, sizes, random.Random(args.seed))
+    print(f"✅ Seeded in {time.perf_counter() - start:.1f}s\n")
+
+    results = {}
+    print(f"{'route':<34} {'p50 ms':>9} {'p95 ms':>9} {'trips':>7} {'bytes':>9}")
+    for route, (needs_login, request) in routes(ids).items():
+        with app_module.app.test_client() as client:
+            if needs_login:
+                with client.session_transaction() as session:
+                    session['_user_id'] = ids['user_id']
+                    session['_fresh'] = True
+            try:
+                request(client)  # warm-up, not measured
+            except NotImplementedError as e:
+                # mongomock lacks some aggregation features (e.g. $lookup sub-pipelines)
+                print(f"{route:<34} ⚠️  skipped under --mock: {e}")
+                continue
+            results[route] = measure(client, counter, request, args.iterations)
+        r = results[route]
+        print(f"{route:<34} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['round_trips']:>7} {r['bytes']:>9}")
+    print()
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'scale': args.scale, 'routes': results}, f, indent=2)
+        print(f"✅ Baseline saved to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('scale') != args.scale:
+            print(f"⚠️  Baseline was recorded at scale {baseline.get('scale')}, this run is {args.scale}")
+        if compare(results, baseline['routes'], args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Minimal stand-in for the Discord OAuth2 API, for exercising the login flow offline.
+
+Run it, then start the app with DISCORD_API_BASE pointing at it:
+    python discord_stub.py
+    DISCORD_API_BASE=http://localhost:5055 python app.py
+
+Every authorization code maps to a stable fake user, so a load tester can log in
+many distinct users by calling /auth/discord/callback?code=<anything>.
+Set STUB_LATENCY_MS to simulate a slow Discord.
+"""
+import os
+import time
+import hashlib
+from urllib.parse import urlencode
+from flask import Flask, request, redirect, jsonify
+
+stub = Flask(__name__)
+LATENCY = int(os.environ.get('STUB_LATENCY_MS', 0)) / 1000
+
+
+def fake_user(seed):
+    # Discord IDs are numeric snowflakes; derive a stable one from the seed
+    digest = hashlib.sha256(seed.encode()).hexdigest()
+    discord_id = str(int(digest[:15], 16))
+    return {
+        'id': discord_id,
+        'username': f'stub_{discord_id[-6:]}',
+        'avatar': None,
+        'email': f'{discord_id}@stub.invalid'
+    }
+
+
+@stub.before_request
+def simulate_latency():
+    if LATENCY:
+        time.sleep(LATENCY)
+
+
+@stub.route('/oauth2/authorize')
+def authorize():
+    code = f"stub-{int(time.time() * 1000)}"
+    return redirect(f"{request.args['redirect_uri']}?{urlencode({'code': code})}")
+
+
+@stub.route('/oauth2/token', methods=['POST'])
+def token():
+    code = request.form.get('code')
+    if not code:
+        return jsonify({'error': 'invalid_grant', 'error_description': 'Missing code'}), 400
+    return jsonify({
+        'access_token': f'token-{code}',
+        'token_type': 'Bearer',
+        'expires_in': 604800,
+        'scope': 'identify email'
+    })
+
+
+@stub.route('/users/@me')
+def current_user():
+    auth = request.headers.get('Authorization', '')
+    if not auth.startswith('Bearer token-'):
+        return jsonify({'message': '401: Unauthorized', 'code': 0}), 401
+    return jsonify(fake_user(auth[len('Bearer token-'):]))
+
+
+if __name__ == '__main__':
+    stub.run(host='127.0.0.1', port=int(os.environ.get('STUB_PORT', 5055)), threaded=True)
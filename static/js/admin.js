@@ -0,0 +1,307 @@
+let currentUserId = null;
+
+function showTab(tabName) {
+    // Update tab buttons
+    document.querySelectorAll('.admin-tab').forEach(tab => tab.classList.remove('active'));
+    event.target.classList.add('active');
+
+    // Update tab content
+    document.querySelectorAll('.tab-content').forEach(content => content.classList.remove('active'));
+    document.getElementById(tabName + '-tab').classList.add('active');
+}
+
+let userSearchQuery = null;
+let userSearchCursor = null;
+
+function searchUsers(loadMore = false) {
+    const query = loadMore ? userSearchQuery : document.getElementById('userSearch').value.trim();
+    if (!query) {
+        alert('Please enter a search term');
+        return;
+    }
+
+    fetch('/api/admin/search_users', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ query: query, cursor: loadMore ? userSearchCursor : null })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            userSearchQuery = query;
+            userSearchCursor = data.next_cursor;
+            displayUsers(data.users, loadMore);
+            document.getElementById('loadMoreUsers').style.display = data.next_cursor ? 'block' : 'none';
+        } else {
+            alert('Search failed: ' + data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Search failed');
+    });
+}
+
+function displayUsers(users, append = false) {
+    const resultsDiv = document.getElementById('userResults');
+
+    if (users.length === 0 && !append) {
+        resultsDiv.innerHTML = '<p style="color: #666666; text-align: center; padding: 2rem;">No users found</p>';
+        updateBulkActions();
+        return;
+    }
+
+    const html = users.map(user => `
+        <div class="user-card">
+            <div class="user-header">
+                <div class="user-info">
+                    <input type="checkbox" class="user-select" value="${user._id}" onchange="updateBulkActions()">
+                    ${user.avatar ? `<img src="${user.avatar}" alt="Avatar" class="user-avatar">` : '<div class="user-avatar" style="background: #333;"></div>'}
+                    <div class="user-details">
+                        <h3>${user.username}</h3>
+                        <p>Discord ID: ${user.discord_id}</p>
+                        <p>Joined: ${new Date(user.created_at).toLocaleDateString()}</p>
+                        ${user.restrictions && Object.keys(user.restrictions).length > 0 ? 
+                            `<span class="restriction-badge">Restricted</span>` : ''}
+                    </div>
+                </div>
+                <div class="user-actions">
+                    <button class="btn btn-small btn-warning" onclick="openRestrictionModal('${user._id}', '${user.username}')">
+                        <i class="fas fa-ban"></i> Restrict
+                    </button>
+                    ${user.restrictions && Object.keys(user.restrictions).length > 0 ? 
+                        `<button class="btn btn-small" onclick="removeRestrictions('${user._id}')">
+                            <i class="fas fa-unlock"></i> Unblock
+                        </button>` : ''}
+                </div>
+            </div>
+        </div>
+    `).join('');
+    if (append) {
+        resultsDiv.insertAdjacentHTML('beforeend', html);
+    } else {
+        resultsDiv.innerHTML = html;
+    }
+    updateBulkActions();
+}
+
+function selectedUserIds() {
+    return Array.from(document.querySelectorAll('.user-select:checked')).map(box => box.value);
+}
+
+function updateBulkActions() {
+    document.getElementById('bulkUserActions').style.display = selectedUserIds().length ? 'flex' : 'none';
+}
+
+// Bulk actions run as background jobs; poll until the job finishes
+function submitBulkAction(body) {
+    return fetch('/api/admin/bulk', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(body)
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (!data.success) {
+            throw new Error(data.error);
+        }
+        return waitForJob(data.job_id);
+    });
+}
+
+function waitForJob(jobId) {
+    return fetch(`/api/admin/jobs/${jobId}`)
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                throw new Error(data.error);
+            }
+            if (data.job.status === 'done') {
+                return data.job.result;
+            }
+            if (data.job.status === 'failed') {
+                throw new Error(data.job.last_error);
+            }
+            return new Promise(resolve => setTimeout(resolve, 1000)).then(() => waitForJob(jobId));
+        });
+}
+
+function deleteSelectedUsers() {
+    const ids = selectedUserIds();
+    if (!ids.length || !confirm(`Delete ${ids.length} users with all their portfolios and reviews? This action cannot be undone.`)) {
+        return;
+    }
+    submitBulkAction({ action: 'delete_users', ids: ids })
+        .then(result => {
+            alert(`Deleted ${result.users_deleted} users, ${result.portfolios_deleted} portfolios and ${result.reviews_deleted} reviews`);
+            searchUsers();
+        })
+        .catch(error => alert('Failed to delete users: ' + error.message));
+}
+
+// userId null restricts every selected user
+function openRestrictionModal(userId, username) {
+    currentUserId = userId;
+    document.getElementById('restrictionModal').classList.remove('hidden');
+    document.getElementById('restrictionModal').style.display = 'flex';
+    document.querySelector('.modal-header h3').textContent = userId
+        ? `Restrict User: ${username}`
+        : `Restrict ${selectedUserIds().length} selected users`;
+
+    // Reset form
+    document.getElementById('restrictionReason').value = '';
+    document.getElementById('blockReviews').checked = false;
+    document.getElementById('blockPortfolios').checked = false;
+    document.getElementById('blockSite').checked = false;
+    document.getElementById('permanentRestriction').checked = false;
+}
+
+function closeRestrictionModal() {
+    document.getElementById('restrictionModal').style.display = 'none';
+    document.getElementById('restrictionModal').classList.add('hidden');
+    currentUserId = null;
+}
+
+function applyRestrictions() {
+    const restrictions = {
+        reason: document.getElementById('restrictionReason').value,
+        block_reviews: document.getElementById('blockReviews').checked,
+        block_portfolios: document.getElementById('blockPortfolios').checked,
+        block_site: document.getElementById('blockSite').checked,
+        permanent: document.getElementById('permanentRestriction').checked
+    };
+
+    if (!restrictions.reason.trim()) {
+        alert('Please provide a reason for the restriction');
+        return;
+    }
+
+    if (!currentUserId) {
+        submitBulkAction({ action: 'restrict_users', ids: selectedUserIds(), restrictions: restrictions })
+            .then(result => {
+                alert(`Restricted ${result.users_restricted} users`);
+                closeRestrictionModal();
+                searchUsers();
+            })
+            .catch(error => alert('Failed to apply restrictions: ' + error.message));
+        return;
+    }
+
+    fetch('/api/admin/restrict_user', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            user_id: currentUserId,
+            restrictions: restrictions
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert('User restrictions applied successfully');
+            closeRestrictionModal();
+            // Refresh search results
+            searchUsers();
+        } else {
+            alert('Failed to apply restrictions: ' + data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Failed to apply restrictions');
+    });
+}
+
+function removeRestrictions(userId) {
+    if (!confirm('Are you sure you want to remove all restrictions for this user?')) {
+        return;
+    }
+
+    fetch('/api/admin/remove_restrictions', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ user_id: userId })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert('User restrictions removed successfully');
+            searchUsers();
+        } else {
+            alert('Failed to remove restrictions: ' + data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Failed to remove restrictions');
+    });
+}
+
+function deletePortfolio() {
+    const input = document.getElementById('portfolioInput').value.trim();
+    if (!input) {
+        alert('Please enter a portfolio URL or ID');
+        return;
+    }
+
+    // Extract IDs from URLs if needed
+    const portfolioIds = input.split(/[\s,]+/).filter(Boolean).map(value => value.split('/portfolio/').pop());
+    if (portfolioIds.length > 1) {
+        if (!confirm(`Are you sure you want to delete ${portfolioIds.length} portfolios? This action cannot be undone.`)) {
+            return;
+        }
+        submitBulkAction({ action: 'delete_portfolios', ids: portfolioIds })
+            .then(result => {
+                alert(`Deleted ${result.portfolios_deleted} portfolios and ${result.reviews_deleted} reviews`);
+                document.getElementById('portfolioInput').value = '';
+            })
+            .catch(error => alert('Failed to delete portfolios: ' + error.message));
+        return;
+    }
+    const portfolioId = portfolioIds[0];
+
+    if (!confirm(`Are you sure you want to delete portfolio ${portfolioId}? This action cannot be undone.`)) {
+        return;
+    }
+
+    fetch('/api/admin/delete_portfolio', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ portfolio_id: portfolioId })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert('Portfolio deleted successfully');
+            document.getElementById('portfolioInput').value = '';
+        } else {
+            alert('Failed to delete portfolio: ' + data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Failed to delete portfolio');
+    });
+}
+
+// Close modal when clicking outside
+document.addEventListener('DOMContentLoaded', function() {
+    const modal = document.getElementById('restrictionModal');
+    if (modal) {
+        modal.addEventListener('click', function(e) {
+            if (e.target === this) {
+                closeRestrictionModal();
+            }
+        });
+    }
+});
@@ -0,0 +1,521 @@
+let currentTemplate = 'modern';
+let elements = [];
+let selectedElement = null;
+let draggedElementType = null;
+let elementCounter = 0;
+// Fingerprinted config URL, read while this script is still the one executing
+const configUrl = document.currentScript.dataset.configUrl;
+
+// Load configuration and initialize
+document.addEventListener('DOMContentLoaded', function() {
+    loadConfig();
+    setupEventListeners();
+});
+
+function loadConfig() {
+    fetch(configUrl)
+        .then(response => response.json())
+        .then(config => {
+            loadTemplates(config.portfolio_templates);
+            loadElements(config.element_types);
+        })
+        .catch(error => {
+            console.error('Error loading config:', error);
+            // Fallback configuration
+            loadTemplates([
+                {id: 'modern', name: 'Modern Portfolio', description: 'Clean and minimalist'},
+                {id: 'creative', name: 'Creative Portfolio', description: 'Bold and artistic'},
+                {id: 'professional', name: 'Professional Portfolio', description: 'Corporate style'},
+                {id: 'developer', name: 'Developer Portfolio', description: 'Tech-focused'}
+            ]);
+            loadElements([
+                {type: 'text_short', name: 'Short Text', icon: '📝'},
+                {type: 'text_long', name: 'Long Text', icon: '📄'},
+                {type: 'image', name: 'Image', icon: '🖼️'},
+                {type: 'button', name: 'Button', icon: '🔘'},
+                {type: 'divider', name: 'Divider', icon: '➖'}
+            ]);
+        });
+}
+
+function loadTemplates(templates) {
+    const selector = document.getElementById('templateSelector');
+    selector.innerHTML = '';
+
+    templates.forEach((template, index) => {
+        const div = document.createElement('div');
+        div.className = `template-option ${index === 0 ? 'active' : ''}`;
+        div.dataset.template = template.id;
+        div.innerHTML = `
+            <div class="template-name">${template.name}</div>
+            <div class="template-desc">${template.description}</div>
+        `;
+        div.onclick = () => selectTemplate(template.id);
+        selector.appendChild(div);
+    });
+}
+
+function loadElements(elementTypes) {
+    const grid = document.getElementById('elementsGrid');
+    grid.innerHTML = '';
+
+    elementTypes.forEach(element => {
+        const div = document.createElement('div');
+        div.className = 'element-item';
+        div.draggable = true;
+        div.dataset.type = element.type;
+        div.innerHTML = `
+            <div class="element-icon">${element.icon}</div>
+            <div class="element-name">${element.name}</div>
+        `;
+        div.ondragstart = (e) => dragStart(e, element.type);
+        grid.appendChild(div);
+    });
+}
+
+function selectTemplate(templateId) {
+    currentTemplate = templateId;
+    document.querySelectorAll('.template-option').forEach(opt => {
+        opt.classList.remove('active');
+    });
+    document.querySelector(`[data-template="${templateId}"]`).classList.add('active');
+}
+
+function setupEventListeners() {
+    // Background color change
+    document.getElementById('backgroundColor').addEventListener('change', function() {
+        document.getElementById('canvas').style.setProperty('--bg-color', this.value);
+    });
+
+    // Remove auto-save on title change
+}
+
+function dragStart(e, elementType) {
+    draggedElementType = elementType;
+    e.dataTransfer.effectAllowed = 'copy';
+}
+
+function allowDrop(e) {
+    e.preventDefault();
+    document.getElementById('canvas').classList.add('drag-over');
+}
+
+function drop(e) {
+    e.preventDefault();
+    document.getElementById('canvas').classList.remove('drag-over');
+
+    if (!draggedElementType) return;
+
+    const canvas = document.getElementById('canvas');
+    const rect = canvas.getBoundingClientRect();
+    const x = e.clientX - rect.left - 50; // Center the element
+    const y = e.clientY - rect.top - 25;
+
+    createElement(draggedElementType, x, y);
+    draggedElementType = null;
+}
+
+function createElement(type, x, y) {
+    elementCounter++;
+    const id = `element_${elementCounter}`;
+
+    const element = {
+        id: id,
+        type: type,
+        x: Math.max(0, x),
+        y: Math.max(0, y),
+        width: getDefaultWidth(type),
+        height: getDefaultHeight(type),
+        properties: getDefaultProperties(type)
+    };
+
+    elements.push(element);
+    renderElement(element);
+}
+
+function getDefaultWidth(type) {
+    switch(type) {
+        case 'text_short': return 300;
+        case 'text_long': return 400;
+        case 'image': return 200;
+        case 'button': return 150;
+        case 'divider': return 300;
+        default: return 200;
+    }
+}
+
+function getDefaultHeight(type) {
+    switch(type) {
+        case 'text_short': return 40;
+        case 'text_long': return 120;
+        case 'image': return 150;
+        case 'button': return 45;
+        case 'divider': return 2;
+        default: return 50;
+    }
+}
+
+function getDefaultProperties(type) {
+    switch(type) {
+        case 'text_short':
+            return { text: 'Your Title Here', fontSize: '1.2rem', fontWeight: '600' };
+        case 'text_long':
+            return { text: 'Your content goes here. You can write multiple lines of text to describe your work, experience, or anything else you want to share.', fontSize: '1rem' };
+        case 'image':
+            return { src: '', alt: 'Image' };
+        case 'button':
+            return { text: 'Click Me', link: '#', backgroundColor: '#00bfff', color: '#000000' };
+        case 'divider':
+            return { color: '#00bfff', thickness: '2px' };
+        default:
+            return {};
+    }
+}
+
+function renderElement(element) {
+    const div = document.createElement('div');
+    div.className = 'canvas-element';
+    div.id = `element-${element.id}`;
+    div.style.cssText = `
+        position: relative;
+        margin-bottom: 1rem;
+        width: 100%;
+        min-height: ${element.height}px;
+    `;
+
+    div.innerHTML = `
+        <div class="element-controls">
+            <button class="control-btn move-up" onclick="moveElement('${element.id}', 'up')" title="Move Up">
+                <i class="fas fa-arrow-up"></i>
+            </button>
+            <button class="control-btn move-down" onclick="moveElement('${element.id}', 'down')" title="Move Down">
+                <i class="fas fa-arrow-down"></i>
+            </button>
+            <button class="control-btn edit-btn" onclick="editElement('${element.id}')" title="Edit">
+                <i class="fas fa-edit"></i>
+            </button>
+            <button class="control-btn delete-btn" onclick="deleteElement('${element.id}')" title="Delete">
+                <i class="fas fa-trash"></i>
+            </button>
+        </div>
+    `;
+
+    const content = createElementContent(element);
+    div.appendChild(content);
+
+    div.onclick = (e) => {
+        e.stopPropagation();
+        selectElement(element.id);
+    };
+
+    document.getElementById('canvas').appendChild(div);
+}
+
+function createElementContent(element) {
+    const content = document.createElement('div');
+
+    switch(element.type) {
+        case 'text_short':
+            const shortText = document.createElement('input');
+            shortText.type = 'text';
+            shortText.className = 'text-element text-short';
+            shortText.value = element.properties.text;
+            shortText.onchange = () => updateElementProperty(element.id, 'text', shortText.value);
+            content.appendChild(shortText);
+            break;
+
+        case 'text_long':
+            const longText = document.createElement('textarea');
+            longText.className = 'text-element text-long';
+            longText.value = element.properties.text;
+            longText.onchange = () => updateElementProperty(element.id, 'text', longText.value);
+            content.appendChild(longText);
+            break;
+
+        case 'image':
+            if (element.properties.src) {
+                const img = document.createElement('img');
+                img.className = 'image-element';
+                img.src = element.properties.src;
+                img.alt = element.properties.alt;
+                content.appendChild(img);
+            } else {
+                const placeholder = document.createElement('div');
+                placeholder.style.cssText = 'border: 2px dashed #666; padding: 2rem; text-align: center; color: #666; cursor: pointer;';
+                placeholder.innerHTML = '<i class="fas fa-image" style="font-size: 2rem; margin-bottom: 0.5rem;"></i><br>Click to upload image';
+                placeholder.onclick = () => uploadImage(element.id);
+                content.appendChild(placeholder);
+            }
+            break;
+
+        case 'button':
+            const button = document.createElement('a');
+            button.className = 'button-element';
+            button.textContent = element.properties.text;
+            button.href = element.properties.link;
+            button.style.backgroundColor = element.properties.backgroundColor;
+            button.style.color = element.properties.color;
+            button.ondblclick = () => editElementProperties(element.id);
+            content.appendChild(button);
+            break;
+
+        case 'divider':
+            const divider = document.createElement('hr');
+            divider.className = 'divider-element';
+            divider.style.backgroundColor = element.properties.color;
+            divider.style.height = element.properties.thickness;
+            content.appendChild(divider);
+            break;
+    }
+
+    return content;
+}
+
+function updateElementPosition(elementId, e) {
+    const element = elements.find(el => el.id === elementId);
+    if (!element) return;
+
+    const canvas = document.getElementById('canvas');
+    const rect = canvas.getBoundingClientRect();
+    element.x = Math.max(0, e.clientX - rect.left - element.width / 2);
+    element.y = Math.max(0, e.clientY - rect.top - element.height / 2);
+
+    const div = document.getElementById(`element-${elementId}`);
+    div.style.left = element.x + 'px';
+    div.style.top = element.y + 'px';
+}
+
+function updateElementProperty(elementId, property, value) {
+    const element = elements.find(el => el.id === elementId);
+    if (element) {
+        element.properties[property] = value;
+    }
+}
+
+function deleteElement(elementId) {
+    elements = elements.filter(el => el.id !== elementId);
+    refreshCanvas();
+}
+
+function moveElement(elementId, direction) {
+    const index = elements.findIndex(el => el.id === elementId);
+    if (index === -1) return;
+
+    if (direction === 'up' && index > 0) {
+        [elements[index], elements[index - 1]] = [elements[index - 1], elements[index]];
+    } else if (direction === 'down' && index < elements.length - 1) {
+        [elements[index], elements[index + 1]] = [elements[index + 1], elements[index]];
+    }
+
+    refreshCanvas();
+}
+
+function editElement(elementId) {
+    const element = elements.find(el => el.id === elementId);
+    if (!element) return;
+
+    const modal = document.createElement('div');
+    modal.className = 'edit-modal';
+    modal.innerHTML = `
+        <div class="edit-modal-content">
+            <div class="edit-modal-header">
+                <h3>Edit ${element.type.replace('_', ' ').toUpperCase()}</h3>
+                <button onclick="closeEditModal()" class="close-btn">&times;</button>
+            </div>
+            <div class="edit-modal-body">
+                ${getEditForm(element)}
+            </div>
+            <div class="edit-modal-footer">
+                <button onclick="saveElementEdit('${elementId}')" class="btn btn-primary">Save</button>
+                <button onclick="closeEditModal()" class="btn btn-secondary">Cancel</button>
+            </div>
+        </div>
+    `;
+    document.body.appendChild(modal);
+}
+
+function getEditForm(element) {
+    switch(element.type) {
+        case 'text_short':
+            return `<label>Text:</label><input type="text" id="editText" value="${element.properties.text}">`;
+        case 'text_long':
+            return `<label>Text:</label><textarea id="editText" rows="4">${element.properties.text}</textarea>`;
+        case 'button':
+            return `
+                <label>Text:</label><input type="text" id="editText" value="${element.properties.text}">
+                <label>Link:</label><input type="url" id="editLink" value="${element.properties.link}">
+                <label>Background Color:</label><input type="color" id="editBgColor" value="${element.properties.backgroundColor}">
+                <label>Text Color:</label><input type="color" id="editTextColor" value="${element.properties.color}">
+            `;
+        case 'divider':
+            return `
+                <label>Color:</label><input type="color" id="editColor" value="${element.properties.color}">
+                <label>Thickness:</label><input type="range" id="editThickness" min="1" max="10" value="${parseInt(element.properties.thickness)}">
+            `;
+        default:
+            return '<p>No editable properties</p>';
+    }
+}
+
+function saveElementEdit(elementId) {
+    const element = elements.find(el => el.id === elementId);
+    if (!element) return;
+
+    switch(element.type) {
+        case 'text_short':
+        case 'text_long':
+            element.properties.text = document.getElementById('editText').value;
+            break;
+        case 'button':
+            element.properties.text = document.getElementById('editText').value;
+            element.properties.link = document.getElementById('editLink').value;
+            element.properties.backgroundColor = document.getElementById('editBgColor').value;
+            element.properties.color = document.getElementById('editTextColor').value;
+            break;
+        case 'divider':
+            element.properties.color = document.getElementById('editColor').value;
+            element.properties.thickness = document.getElementById('editThickness').value + 'px';
+            break;
+    }
+
+    refreshCanvas();
+    closeEditModal();
+}
+
+function closeEditModal() {
+    const modal = document.querySelector('.edit-modal');
+    if (modal) modal.remove();
+}
+
+function selectElement(elementId) {
+    // Remove previous selection
+    document.querySelectorAll('.canvas-element').forEach(el => el.classList.remove('selected'));
+
+    // Select current element
+    document.getElementById(`element-${elementId}`).classList.add('selected');
+    selectedElement = elementId;
+}
+
+function uploadImage(elementId) {
+    const input = document.createElement('input');
+    input.type = 'file';
+    input.accept = 'image/*';
+    input.onchange = function() {
+        if (this.files[0]) {
+            const formData = new FormData();
+            formData.append('file', this.files[0]);
+
+            fetch('/api/upload_image', {
+                method: 'POST',
+                body: formData
+            })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    updateElementProperty(elementId, 'src', data.url);
+                    updateElementProperty(elementId, 'srcset', data.srcset);
+                    updateElementProperty(elementId, 'webp_srcset', data.webp_srcset);
+                    refreshCanvas();
+                } else {
+                    alert('Failed to upload image: ' + data.error);
+                }
+            });
+        }
+    };
+    input.click();
+}
+
+function refreshCanvas() {
+    const canvas = document.getElementById('canvas');
+    canvas.querySelectorAll('.canvas-element').forEach(el => el.remove());
+    elements.forEach(element => renderElement(element));
+}
+
+function clearCanvas() {
+    if (confirm('Are you sure you want to clear the canvas? This action cannot be undone.')) {
+        elements = [];
+        refreshCanvas();
+    }
+}
+
+// Auto-save functionality removed - manual save only
+
+function savePortfolio() {
+    // Prevent multiple saves in progress
+    if (window.saveInProgress) {
+        return;
+    }
+    window.saveInProgress = true;
+
+    const portfolioData = {
+        title: document.getElementById('portfolioTitle').value,
+        template: currentTemplate,
+        background_color: document.getElementById('backgroundColor').value,
+        elements: elements
+    };
+
+    fetch('/api/save_portfolio', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(portfolioData)
+    })
+    .then(response => response.json())
+    .then(data => {
+        window.saveInProgress = false;
+        if (data.success) {
+            showSaveStatus();
+            // Redirect to homepage after saving
+            setTimeout(() => {
+                window.location.href = '/';
+            }, 1500);
+        } else {
+            alert('Failed to save portfolio: ' + data.error);
+        }
+    })
+    .catch(error => {
+        window.saveInProgress = false;
+        console.error('Error:', error);
+        alert('Failed to save portfolio');
+    });
+}
+
+function showSaveStatus() {
+    const status = document.getElementById('saveStatus');
+    status.style.display = 'block';
+    setTimeout(() => {
+        status.style.display = 'none';
+    }, 3000);
+}
+
+function previewPortfolio() {
+    // Open preview in new tab
+    const portfolioData = {
+        title: document.getElementById('portfolioTitle').value,
+        template: currentTemplate,
+        background_color: document.getElementById('backgroundColor').value,
+        elements: elements
+    };
+
+    // Store in session storage for preview
+    sessionStorage.setItem('previewData', JSON.stringify(portfolioData));
+    window.open('/preview', '_blank');
+}
+
+// Prevent default drag behavior on canvas
+document.getElementById('canvas').addEventListener('dragover', function(e) {
+    e.preventDefault();
+});
+
+document.getElementById('canvas').addEventListener('dragleave', function(e) {
+    this.classList.remove('drag-over');
+});
+
+// Click outside to deselect
+document.getElementById('canvas').addEventListener('click', function(e) {
+    if (e.target === this) {
+        document.querySelectorAll('.canvas-element').forEach(el => el.classList.remove('selected'));
+        selectedElement = null;
+    }
+});
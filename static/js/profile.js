@@ -0,0 +1,110 @@
+// Apply tag colors when page loads
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.user-tag[data-tag-color]').forEach(tag => {
+        const color = tag.getAttribute('data-tag-color');
+        if (color) {
+            tag.style.backgroundColor = color;
+        }
+    });
+});
+
+function saveVisibility() {
+    const visibility = document.getElementById('profileVisibility').value;
+    const visibilityIndicator = document.getElementById('visibilityIndicator');
+
+    fetch('/api/update_profile', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            profile_visibility: visibility
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            visibilityIndicator.classList.add('show');
+            setTimeout(() => {
+                visibilityIndicator.classList.remove('show');
+            }, 2000);
+        }
+    });
+}
+
+function saveDescription() {
+    const description = document.getElementById('profileDescription').value;
+    const saveIndicator = document.getElementById('saveIndicator');
+
+    fetch('/api/update_profile', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            description: description
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            saveIndicator.classList.add('show');
+            setTimeout(() => {
+                saveIndicator.classList.remove('show');
+            }, 2000);
+        }
+    });
+}
+
+function toggleDropdown(portfolioId) {
+    const dropdown = document.getElementById('dropdown-' + portfolioId);
+    dropdown.classList.toggle('show');
+
+    // Close other dropdowns
+    document.querySelectorAll('.dropdown-menu').forEach(menu => {
+        if (menu.id !== 'dropdown-' + portfolioId) {
+            menu.classList.remove('show');
+        }
+    });
+}
+
+function deletePortfolio(portfolioId) {
+    if (confirm('Are you sure you want to delete this portfolio? This action cannot be undone.')) {
+        fetch('/api/delete_portfolio', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                portfolio_id: portfolioId
+            })
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                location.reload();
+            } else {
+                alert('Failed to delete portfolio: ' + data.error);
+            }
+        });
+    }
+}
+
+// Close dropdowns when clicking outside
+document.addEventListener('click', function(event) {
+    if (!event.target.closest('.dropdown')) {
+        document.querySelectorAll('.dropdown-menu').forEach(menu => {
+            menu.classList.remove('show');
+        });
+    }
+});
+
+// Apply background colors from data attributes when page loads
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.portfolio-preview[data-bg-color]').forEach(preview => {
+        const bgColor = preview.getAttribute('data-bg-color');
+        if (bgColor) {
+            preview.style.backgroundColor = bgColor;
+        }
+    });
+});
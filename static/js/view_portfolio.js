@@ -0,0 +1,191 @@
+// Set portfolio canvas background and element styling
+document.addEventListener('DOMContentLoaded', function() {
+    var canvas = document.getElementById('portfolioCanvas');
+    canvas.style.backgroundColor = canvas.dataset.backgroundColor;
+
+    var elements = canvas.querySelectorAll('.portfolio-element');
+    elements.forEach(function(el) {
+        // Remove absolute positioning data attributes - use natural flow
+        var divider = el.querySelector('.element-divider');
+        if (divider) {
+            divider.style.backgroundColor = divider.getAttribute('data-color');
+            divider.style.height = divider.getAttribute('data-thickness');
+        }
+    });
+});
+
+let currentPortfolioId = null;
+let selectedRating = 0;
+
+// Page data is rendered onto the canvas element as data-* attributes
+function portfolioCanvas() {
+    return document.getElementById('portfolioCanvas');
+}
+
+// Older reviews are fetched a page at a time
+function escapeHtml(value) {
+    const div = document.createElement('div');
+    div.textContent = value == null ? '' : String(value);
+    return div.innerHTML;
+}
+
+function loadMoreReviews() {
+    const button = document.getElementById('loadMoreReviews');
+    button.disabled = true;
+    fetch(`/api/portfolio/${portfolioCanvas().dataset.portfolioId}/reviews?cursor=${encodeURIComponent(button.dataset.nextCursor)}`)
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                throw new Error(data.error);
+            }
+            const list = document.getElementById('reviewList');
+            data.reviews.forEach(review => {
+                let stars = '';
+                for (let i = 1; i <= 5; i++) {
+                    stars += `<i class="fas fa-star" style="color: ${i <= review.rating ? '#00bfff' : '#333333'};"></i>`;
+                }
+                list.insertAdjacentHTML('beforeend', `
+                    <div class="review-card">
+                        <div class="review-header">
+                            <div class="reviewer-info">
+                                <div class="reviewer-name">${escapeHtml(review.username)}</div>
+                                <div class="review-date">${escapeHtml(review.created_at_display)}</div>
+                            </div>
+                            <div class="review-rating">${stars}</div>
+                        </div>
+                        ${review.comment ? `<div class="review-comment">${escapeHtml(review.comment)}</div>` : ''}
+                    </div>`);
+            });
+            if (data.next_cursor) {
+                button.dataset.nextCursor = data.next_cursor;
+                button.disabled = false;
+            } else {
+                button.parentElement.remove();
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            button.disabled = false;
+        });
+}
+
+// Review modal functions
+function openReviewModal(portfolioId, portfolioTitle) {
+    currentPortfolioId = portfolioId;
+    document.getElementById('reviewModal').style.display = 'flex';
+    document.querySelector('.modal-header h3').textContent = `Review: ${portfolioTitle}`;
+
+    // Reset form
+    selectedRating = 0;
+    document.querySelectorAll('.star-rating i').forEach(star => star.classList.remove('active'));
+    document.getElementById('reviewComment').value = '';
+}
+
+function closeReviewModal() {
+    document.getElementById('reviewModal').style.display = 'none';
+    currentPortfolioId = null;
+    selectedRating = 0;
+}
+
+// Star rating functionality - wrapped in DOMContentLoaded
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.star-rating i').forEach(star => {
+        star.addEventListener('click', function() {
+            selectedRating = parseInt(this.dataset.rating);
+            updateStarRating();
+        });
+
+        star.addEventListener('mouseenter', function() {
+            const rating = parseInt(this.dataset.rating);
+            highlightStars(rating);
+        });
+    });
+
+    const starRating = document.getElementById('starRating');
+    if (starRating) {
+        starRating.addEventListener('mouseleave', function() {
+            updateStarRating();
+        });
+    }
+
+    // Close modal when clicking outside
+    const reviewModal = document.getElementById('reviewModal');
+    if (reviewModal) {
+        reviewModal.addEventListener('click', function(e) {
+            if (e.target === this) {
+                closeReviewModal();
+            }
+        });
+    }
+});
+
+function highlightStars(rating) {
+    document.querySelectorAll('.star-rating i').forEach((star, index) => {
+        if (index < rating) {
+            star.style.color = '#00bfff';
+        } else {
+            star.style.color = '#333333';
+        }
+    });
+}
+
+function updateStarRating() {
+    document.querySelectorAll('.star-rating i').forEach((star, index) => {
+        if (index < selectedRating) {
+            star.classList.add('active');
+            star.style.color = '#00bfff';
+        } else {
+            star.classList.remove('active');
+            star.style.color = '#333333';
+        }
+    });
+}
+
+function submitReview() {
+    if (selectedRating === 0) {
+        alert('Please select a rating');
+        return;
+    }
+
+    const comment = document.getElementById('reviewComment').value;
+
+    fetch('/api/submit_review', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            portfolio_id: currentPortfolioId,
+            rating: selectedRating,
+            comment: comment
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert('Review submitted successfully!');
+            closeReviewModal();
+            location.reload();
+        } else {
+            alert(data.error || 'Failed to submit review');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Failed to submit review');
+    });
+}
+
+function sharePortfolio() {
+    if (navigator.share) {
+        navigator.share({
+            title: portfolioCanvas().dataset.portfolioTitle,
+            text: 'Check out this amazing portfolio!',
+            url: window.location.href
+        });
+    } else {
+        navigator.clipboard.writeText(window.location.href).then(() => {
+            alert('Portfolio link copied to clipboard!');
+        });
+    }
+}
@@ -1,33 +1,387 @@
 #!/usr/bin/env python3
 """
 Simple test script to verify the Flask application starts correctly
+
+Run it directly for a smoke check, or with pytest for the regression tests
+below (these run against mongomock: pip install pytest mongomock).
 """
 import sys
 import os
+import io
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
 
 # Add the current directory to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# Tests never build indexes in the background or run a job worker
+os.environ.setdefault('MONGO_ENSURE_INDEXES', '0')
+os.environ.setdefault('JOB_WORKER', '0')
+
 try:
-    from app import app
-    print("✅ Flask app imported successfully")
-    
-    # Test basic route
-    with app.test_client() as client:
-        response = client.get('/')
-        if response.status_code == 200:
-            print("✅ Homepage route works")
-        else:
-            print(f"❌ Homepage returned status {response.status_code}")
-    
-    print("✅ Application is ready to run")
-    print("\nTo start the server:")
-    print("1. Set up your .env file with Discord OAuth credentials")
-    print("2. Run: python app.py")
-    print("3. Visit: http://localhost:5000")
-    
-except ImportError as e:
-    print(f"❌ Import error: {e}")
-    print("Install dependencies with: pip install -r requirements.txt")
-except Exception as e:
-    print(f"❌ Error: {e}")
+    import pytest
+except ImportError:  # running as a plain script
+    pytest = None
+
+
+def main():
+    try:
+        from app import app
+        print("✅ Flask app imported successfully")
+
+        # Test basic route
+        with app.test_client() as client:
+            response = client.get('/')
+            if response.status_code == 200:
+                print("✅ Homepage route works")
+            else:
+                print(f"❌ Homepage returned status {response.status_code}")
+
+        print("✅ Application is ready to run")
+        print("\nTo start the server:")
+        print("1. Set up your .env file with Discord OAuth credentials")
+        print("2. Run: python app.py")
+        print("3. Visit: http://localhost:5000")
+
+    except ImportError as e:
+        print(f"❌ Import error: {e}")
+        print("Install dependencies with: pip install -r requirements.txt")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+
+if pytest:
+    @pytest.fixture
+    def app_module(tmp_path, monkeypatch):
+        """A fresh app (and fresh caches) wired to an empty in-memory database."""
+        mongomock = pytest.importorskip('mongomock')
+        import app as app_module
+        app_module.create_app({'TESTING': True, 'UPLOAD_FOLDER': str(tmp_path / 'uploads')})
+        monkeypatch.setattr(app_module, 'mongo', SimpleNamespace(db=mongomock.MongoClient().portfolio_db))
+        return app_module
+
+    @pytest.fixture
+    def db(app_module):
+        return app_module.mongo.db
+
+    @pytest.fixture
+    def client(app_module):
+        return app_module.app.test_client()
+
+    def log_in(client, db, discord_id='100', username='alice'):
+        if not db.users.find_one({'discord_id': discord_id}):
+            db.users.insert_one({'discord_id': discord_id, 'username': username})
+        with client.session_transaction() as session:
+            session['_user_id'] = discord_id
+            session['_fresh'] = True
+
+    def make_portfolio(db, **fields):
+        portfolio = {
+            'user_id': '100', 'username': 'alice', 'title': 'Mine', 'template': 'modern',
+            'background_color': '#000000', 'elements': [], 'version': 1,
+            'review_count': 0, 'rating_sum': 0, 'avg_rating': 0, 'created_at': datetime.utcnow()
+        }
+        portfolio.update(fields)
+        return db.portfolios.insert_one(portfolio).inserted_id
+
+    def test_deleting_a_reviewer_invalidates_the_portfolio_page(app_module, db, client):
+        portfolio_id = make_portfolio(db)
+        reviewer = db.users.insert_one({'discord_id': '200', 'username': 'bob'}).inserted_id
+        db.reviews.insert_one({'portfolio_id': portfolio_id, 'user_id': '200', 'username': 'bob', 'rating': 1,
+                               'comment': 'Reviewer to be deleted', 'created_at': datetime.utcnow()})
+        with app_module.app.app_context():
+            app_module.rebuild_rating_stats([portfolio_id])
+
+        first = client.get(f'/portfolio/{portfolio_id}')
+        assert b'Reviewer to be deleted' in first.data
+
+        with app_module.app.app_context():
+            app_module.enqueue_job('delete_users', {'user_ids': [reviewer]})
+            assert app_module.run_pending_jobs() == (1, 0)
+
+        second = client.get(f'/portfolio/{portfolio_id}', headers={'If-None-Match': first.headers['ETag']})
+        assert second.status_code == 200
+        assert second.headers['ETag'] != first.headers['ETag']
+        assert b'Reviewer to be deleted' not in second.data
+        assert db.portfolios.find_one({'_id': portfolio_id})['review_count'] == 0
+
+    def test_a_deploy_invalidates_cached_portfolio_pages(app_module, db, client, monkeypatch):
+        portfolio_id = make_portfolio(db)
+        first = client.get(f'/portfolio/{portfolio_id}')
+        assert client.get(f'/portfolio/{portfolio_id}', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+        # New assets: pages linking the old hashes must be re-rendered, not revalidated
+        monkeypatch.setattr(app_module.asset_bundle, 'digest', 'a' * 12)
+        second = client.get(f'/portfolio/{portfolio_id}', headers={'If-None-Match': first.headers['ETag']})
+        assert second.status_code == 200 and second.headers['ETag'] != first.headers['ETag']
+
+        # New code with the same assets
+        app_module.app.config['APP_VERSION'] = 'next-release'
+        third = client.get(f'/portfolio/{portfolio_id}', headers={'If-None-Match': second.headers['ETag']})
+        assert third.status_code == 200 and third.headers['ETag'] != second.headers['ETag']
+
+    def test_run_jobs_schedules_and_runs_the_rankings(app_module, db):
+        portfolio_id = make_portfolio(db)
+        db.reviews.insert_one({'portfolio_id': portfolio_id, 'user_id': '200', 'rating': 4, 'created_at': datetime.utcnow()})
+
+        result = app_module.app.test_cli_runner().invoke(args=['run-jobs'])
+        assert result.exit_code == 0, result.output
+        assert db.jobs.find_one({'recurring': 'compute_rankings'})['status'] == 'pending'
+        assert db.portfolios.find_one({'_id': portfolio_id})['bayes_score'] == 4
+
+    def test_restriction_applies_on_the_users_next_request(app_module, db, client):
+        portfolio_id = make_portfolio(db, user_id='300', username='carol')
+        user_id = db.users.insert_one({'discord_id': '300', 'username': 'carol'}).inserted_id
+        carol = app_module.app.test_client()
+        log_in(carol, db, '300', 'carol')
+        review = {'portfolio_id': str(portfolio_id), 'rating': 5, 'comment': 'Self review'}
+        # Loads (and caches) carol before the restriction
+        assert carol.get('/').status_code == 200
+
+        admin_id = app_module.ADMIN_USER_IDS[0]
+        log_in(client, db, admin_id, 'admin')
+        response = client.post('/api/admin/restrict_user', json={'user_id': str(user_id), 'restrictions': {'block_site': True}})
+        assert response.get_json() == {'success': True}
+
+        assert carol.post('/api/submit_review', json=review).status_code == 302
+        assert db.reviews.count_documents({}) == 0
+
+    def test_rankings_smooth_ratings_and_page_past_the_cached_top_n(app_module, db, client):
+        from bson import ObjectId
+        now = datetime.utcnow()
+
+        def review(portfolio_id, rating, age=timedelta(0)):
+            return {'portfolio_id': portfolio_id, 'user_id': str(ObjectId()), 'rating': rating, 'created_at': now - age}
+
+        one_review = make_portfolio(db, title='One 5-star review')
+        track_record = make_portfolio(db, title='200 reviews at 4.8')
+        old_news = make_portfolio(db, title='One 5-star review, a month ago')
+        reviews = [review(one_review, 5), review(old_news, 5, timedelta(days=30))]
+        reviews += [review(track_record, 5 if n < 160 else 4) for n in range(200)]
+        for n in range(10):
+            average = make_portfolio(db, title=f'Average {n}')
+            reviews += [review(average, 3) for _ in range(20)]
+        db.reviews.insert_many(reviews)
+        for n in range(3):
+            make_portfolio(db, title=f'Unreviewed {n}')
+
+        with app_module.app.app_context():
+            app_module.compute_rankings()
+        make_portfolio(db, title='Not scored yet')
+        scores = {p['_id']: p for p in db.portfolios.find()}
+        assert scores[track_record]['bayes_score'] > scores[one_review]['bayes_score']
+        assert scores[one_review]['trending_score'] > 100 * scores[old_news]['trending_score']
+
+        ranking = [p['_id'] for p in db.portfolios.find().sort(app_module.ranking_sort('rating'))]
+        assert ranking[0] == track_record and len(ranking) == 17
+        app_module.app.config['RANKING_TOP_N'] = 5
+        app_module.ranking_cache.invalidate()
+        for limit in (2, 3, 5):
+            seen, cursor = [], None
+            while True:
+                page = client.get('/api/portfolios', query_string={'limit': limit, **({'cursor': cursor} if cursor else {})}).get_json()
+                seen += [ObjectId(p['_id']) for p in page['portfolios']]
+                cursor = page['next_cursor']
+                if not cursor:
+                    break
+            assert seen == ranking, limit
+
+    def test_legacy_profile_links_hit_the_summary_cache(app_module, db, monkeypatch):
+        user_id = db.users.insert_one({'discord_id': '100', 'username': 'alice'}).inserted_id
+        loads = []
+
+        def load_profile_summary(criteria):
+            loads.append(criteria)
+            return {**db.users.find_one(criteria), 'portfolios': []}
+        monkeypatch.setattr(app_module, 'load_profile_summary', load_profile_summary)
+
+        with app_module.app.app_context():
+            for key in (str(user_id), str(user_id), '100'):
+                assert app_module.get_profile_summary(key)['username'] == 'alice'
+        assert loads == [{'discord_id': '100'}]
+
+    def test_image_variants_follow_exif_rotation(app_module, db, client):
+        from PIL import Image
+        # Stored 2000x1000 with orientation 6 (rotate 90° clockwise): displays as 1000x2000
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        upload = io.BytesIO()
+        Image.new('RGB', (2000, 1000), 'red').save(upload, 'JPEG', exif=exif)
+        upload.seek(0)
+
+        log_in(client, db)
+        result = client.post('/api/upload_image', data={'file': (upload, 'photo.jpg')}).get_json()
+        assert result['success']
+        assert (result['width'], result['height']) == (1000, 2000)
+
+        variant = next(v for v in result['variants'] if v['width'] == 320 and v['type'] == 'image/jpeg')
+        stored = app_module.upload_storage.open(variant['url'].rsplit('/', 1)[-1])
+        with stored.file, Image.open(stored.file) as image:
+            assert image.size == (320, 640)
+
+    def test_gc_uploads_deletes_only_old_unreferenced_files(app_module, db):
+        referenced = 'a' * 32
+        kept = [f'{referenced}.jpg', f'{referenced}_320.jpg', f'{referenced}_640.jpg',
+                f'{referenced}.webp', f'{referenced}_320.webp', '1700000000_logo.png']
+        orphans = [f"{'b' * 32}.png", f"{'b' * 32}_320.webp", '1600000000_old.png']
+        fresh = [f"{'c' * 32}.png"]
+        root = app_module.upload_storage.root
+        day_ago = time.time() - 2 * 24 * 3600
+        for name in kept + orphans + fresh:
+            with open(os.path.join(root, name), 'wb') as f:
+                f.write(b'x' * 10)
+            if name not in fresh:
+                os.utime(os.path.join(root, name), (day_ago, day_ago))
+        make_portfolio(db, elements=[
+            {'id': 'element_1', 'type': 'image', 'properties': {'src': f'/uploads/{referenced}.jpg'}},
+            # Saved before uploads moved out of static/
+            {'id': 'element_2', 'type': 'image', 'properties': {'src': '/static/uploads/1700000000_logo.png'}},
+        ])
+        runner = app_module.app.test_cli_runner()
+
+        result = runner.invoke(args=['gc-uploads', '--dry-run'])
+        assert result.exit_code == 0, result.output
+        assert 'would delete 3 files' in result.output
+        assert sorted(os.listdir(root)) == sorted(kept + orphans + fresh)
+
+        result = runner.invoke(args=['gc-uploads'])
+        assert result.exit_code == 0, result.output
+        assert sorted(os.listdir(root)) == sorted(kept + fresh)
+
+    def test_failing_patch_op_leaves_portfolio_untouched(db, client):
+        elements = [{'id': 'element_1', 'type': 'text_short', 'properties': {'text': 'one'}},
+                    {'id': 'element_2', 'type': 'text_short', 'properties': {'text': 'two'}}]
+        portfolio_id = make_portfolio(db, title='Before', elements=elements, version=3)
+        log_in(client, db)
+
+        response = client.post('/api/patch_portfolio', json={'portfolio_id': str(portfolio_id), 'version': 3, 'ops': [
+            {'op': 'set', 'field': 'title', 'value': 'After'},
+            {'op': 'add', 'element': {'id': 'element_3', 'type': 'text_short', 'properties': {'text': 'three'}}},
+            {'op': 'update', 'id': 'element_9', 'changes': {'x': 10}},
+        ]})
+        assert response.status_code == 400
+        assert response.get_json()['error'].startswith('Operation 3')
+        stored = db.portfolios.find_one({'_id': portfolio_id})
+        assert (stored['title'], stored['version'], stored['elements']) == ('Before', 3, elements)
+
+        # The client still holds version 3, so retrying a corrected diff is not a conflict
+        response = client.post('/api/patch_portfolio', json={'portfolio_id': str(portfolio_id), 'version': 3, 'ops': [
+            {'op': 'set', 'field': 'title', 'value': 'After'},
+            {'op': 'add', 'element': {'id': 'element_3', 'type': 'text_short', 'properties': {'text': 'three'}}, 'index': 0},
+            {'op': 'move', 'id': 'element_1', 'index': 2},
+            {'op': 'remove', 'id': 'element_2'},
+        ]})
+        assert response.get_json() == {'success': True, 'portfolio_id': str(portfolio_id), 'version': 4}
+        stored = db.portfolios.find_one({'_id': portfolio_id})
+        assert stored['title'] == 'After'
+        assert [element['id'] for element in stored['elements']] == ['element_3', 'element_1']
+        assert stored['search_text'] == 'three one'
+
+        stale = client.post('/api/patch_portfolio', json={'portfolio_id': str(portfolio_id), 'version': 3, 'ops': [
+            {'op': 'set', 'field': 'title', 'value': 'Stale'},
+        ]})
+        assert stale.status_code == 409
+
+    def test_patch_with_a_malformed_portfolio_id_is_rejected(db, client):
+        log_in(client, db)
+        response = client.post('/api/patch_portfolio', json={'portfolio_id': 'zz', 'version': 1, 'ops': [
+            {'op': 'set', 'field': 'title', 'value': 'After'},
+        ]})
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+
+    def test_duplicate_reviews_are_removed_before_the_unique_index(app_module, db, client):
+        portfolio_id = make_portfolio(db)
+        for rating, minute in ((5, 1), (1, 2), (1, 3)):
+            db.reviews.insert_one({'portfolio_id': portfolio_id, 'user_id': '200', 'rating': rating,
+                                   'created_at': datetime(2026, 1, 1, 0, minute)})
+
+        with app_module.app.app_context():
+            assert app_module.ensure_indexes(db) == []
+        assert [r['rating'] for r in db.reviews.find({'portfolio_id': portfolio_id})] == [5]
+        assert db.portfolios.find_one({'_id': portfolio_id})['review_count'] == 1
+        assert app_module.find_missing_indexes(db) == []
+
+    def test_text_index_is_found_in_the_form_the_server_reports(app_module, db):
+        with app_module.app.app_context():
+            app_module.ensure_indexes(db)
+        # A real server reports the text index by its internal _fts/_ftsx keys, not the spec
+        server_indexes = db.portfolios.index_information()
+        server_indexes['portfolio_search'] = {
+            'key': [('_fts', 'text'), ('_ftsx', 1)],
+            'weights': {'title': 10, 'username': 5, 'search_text': 1},
+        }
+        server = {name: db[name] for name in app_module.REQUIRED_INDEXES}
+        server['portfolios'] = SimpleNamespace(index_information=lambda: server_indexes)
+        assert app_module.find_missing_indexes(server) == []
+
+        del server_indexes['portfolio_search']
+        assert [collection for collection, keys in app_module.find_missing_indexes(server)] == ['portfolios']
+
+    def test_export_then_import_round_trips_ids_and_dates(app_module, db, tmp_path, monkeypatch):
+        import mongomock
+        created = datetime(2026, 1, 2, 3, 4, 5)
+        portfolio_id = make_portfolio(db, created_at=created, elements=[{'id': 'element_1', 'type': 'text_short', 'properties': {'text': 'hi'}}])
+        db.users.insert_one({'discord_id': '100', 'username': 'alice', 'restrictions': {}})
+        db.reviews.insert_one({'portfolio_id': portfolio_id, 'user_id': '200', 'rating': 5, 'created_at': created})
+        dump = tmp_path / 'dump.ndjson'
+        runner = app_module.app.test_cli_runner()
+        assert runner.invoke(args=['export-data', '-o', str(dump)]).exit_code == 0
+
+        target = mongomock.MongoClient().restored_db
+        monkeypatch.setattr(app_module, 'mongo', SimpleNamespace(db=target))
+        result = runner.invoke(args=['import-data', str(dump)])
+        assert result.exit_code == 0, result.output
+        assert 'Imported 3 documents' in result.output
+        for collection in app_module.EXPORT_COLLECTIONS:
+            assert list(target[collection].find()) == list(db[collection].find())
+        assert target.reviews.find_one()['portfolio_id'] == portfolio_id
+        assert target.portfolios.find_one()['created_at'] == created
+
+    def test_import_resumes_after_its_checkpoint(app_module, db, tmp_path):
+        docs = [{'_id': app_module.ObjectId(), 'discord_id': str(n), 'username': f'user{n}'} for n in range(4)]
+        lines = [app_module.json_util.dumps({'collection': 'users', 'doc': doc}, json_options=app_module.json_util.RELAXED_JSON_OPTIONS) + '\n'
+                 for doc in docs]
+        checkpoint = tmp_path / 'dump.ndjson.checkpoint'
+        checkpoint.write_text('2')
+        # Line 3 was written before the previous run stopped, but after its last checkpoint
+        db.users.insert_one(dict(docs[2]))
+
+        with app_module.app.app_context():
+            stats = app_module.import_ndjson(lines, str(checkpoint), batch_size=10)
+        assert stats == {'resumed_after': 2, 'written': 1, 'skipped': 1}
+        assert sorted(user['discord_id'] for user in db.users.find()) == ['2', '3']
+        assert checkpoint.read_text() == '4'
+
+    def test_second_review_is_rejected_without_the_unique_index(db, client):
+        portfolio_id = make_portfolio(db)
+        log_in(client, db, '200', 'bob')
+        review = {'portfolio_id': str(portfolio_id), 'rating': 5, 'comment': 'Great'}
+        assert client.post('/api/submit_review', json=review).get_json() == {'success': True}
+        assert client.post('/api/submit_review', json=review).get_json()['success'] is False
+        assert db.reviews.count_documents({}) == 1
+        assert db.portfolios.find_one({'_id': portfolio_id})['review_count'] == 1
+
+    def test_search_rejects_a_cursor_with_a_malformed_id(app_module, db, client):
+        make_portfolio(db, template='modern', avg_rating=4.0)
+        cursor = app_module.encode_cursor({'s': 4.0, 'i': 'not-an-object-id'})
+        response = client.get('/api/portfolios/search', query_string={'template': 'modern', 'sort': 'rating', 'cursor': cursor})
+        assert response.status_code == 400
+        assert response.get_json() == {'success': False, 'error': 'Invalid cursor'}
+
+    def test_logged_in_pages_return_503_while_the_database_is_down(app_module, db, client, monkeypatch):
+        from pymongo.errors import ServerSelectionTimeoutError
+
+        class Unavailable:
+            def __getattr__(self, name):
+                raise ServerSelectionTimeoutError('127.0.0.1:1: connection refused')
+
+        log_in(client, db)
+        monkeypatch.setattr(app_module, 'mongo', SimpleNamespace(db=Unavailable()))
+        assert client.get('/portfolios').status_code == 503
+        assert client.get('/').status_code == 200
+
+
+if __name__ == '__main__':
+    main()